@@ -2,23 +2,36 @@
 from __future__ import annotations
 import asyncio
 import time as _time
-import json
 import os
 import math
 import contextlib
+import functools
+import hashlib
+import zlib
+from collections import deque
 from pathlib import Path
-from typing import Dict, Set, Optional
+from typing import Dict, Optional
 from math import isfinite
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Response, Request
-from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse
+from fastapi.responses import FileResponse, PlainTextResponse, JSONResponse, ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
 from pydantic import BaseModel
-import yaml as _yaml
+try:
+    import orjson  # C encoder; stdlib json below is the portable fallback
+except ImportError:
+    orjson = None
+    import json
+try:
+    import msgpack  # optional: clients that don't negotiate it get JSON frames
+except ImportError:
+    msgpack = None
 from .config import Config
 from .state import State
-from .sound import sound_info
-from .depth import aggregate_top10, aggregate_both_top10, AggregatedLevel, AlertEvent, DepthLevel
-from decimal import Decimal
+from .sound import SoundInfo, sound_info
+from .depth import aggregate_top10, aggregate_both_top10, AggregatedLevel, AlertEvent, DepthLevel, TICKS_PER_UNIT, to_ticks
 from .ib_client import IBConfig, IBDepthManager
 from .obi import compute_obi, choose_alpha_heuristic
 from .recording import NDJSONRecorder
@@ -37,6 +50,9 @@ def _pct_band() -> float:
         v = 0.20
     return max(0.05, min(v, 0.50))
 
+# Parsed once: the band is process-wide config, not something to re-read per snapshot
+_L2_BAND_PCT = _pct_band()
+
 def _get_anchor_price() -> float | None:
     """Midpoint of last tick-by-tick bid/ask when available; else last trade."""
     try:
@@ -58,17 +74,11 @@ def _filter_dom_outliers(asks: list[DepthLevel], bids: list[DepthLevel]) -> tupl
     anchor = _get_anchor_price()
     if anchor is None or anchor <= 0:
         return asks, bids
-    pct = _pct_band()
-    lo = anchor * (1.0 - pct)
-    hi = anchor * (1.0 + pct)
-    def keep(row: DepthLevel) -> bool:
-        try:
-            p = float(row.price)
-            return (p >= lo) and (p <= hi)
-        except Exception:
-            return False
-    A = [r for r in asks if keep(r)]
-    B = [r for r in bids if keep(r)]
+    # Bounds in ticks so rows compare as plain ints (no conversion per row)
+    lo = anchor * (1.0 - _L2_BAND_PCT) * TICKS_PER_UNIT
+    hi = anchor * (1.0 + _L2_BAND_PCT) * TICKS_PER_UNIT
+    A = [r for r in asks if lo <= r.price_ticks <= hi]
+    B = [r for r in bids if lo <= r.price_ticks <= hi]
     # If filtering nuked a side entirely (e.g., at session start), keep originals
     return (A or asks), (B or bids)
 
@@ -80,22 +90,53 @@ def _is_true(x) -> bool:
 TNS_DEBUG = _is_true(os.getenv("EI_TNS_DEBUG", "")) or _is_true(os.getenv("EI_DEBUG", "")) \
             or (str(getattr(cfg, "log_level", "")).lower() == "debug")
 
-def tns_log(msg: str):
-    """Thread-safe debug logger that works in both the main loop and AnyIO worker threads."""
+def tns_log(msg: str, *args):
+    """Thread-safe debug logger that works in both the main loop and AnyIO worker threads.
+
+    `msg` is %-formatted with `args` only when T&S debugging is on, so hot-path
+    callers pay for a call and a flag check, not for building the string.
+    """
     if not TNS_DEBUG:
         return
+    if args:
+        msg = msg % args
     try:
         ts = asyncio.get_running_loop().time() # fast, monotonic, event-loop time
     except RuntimeError:
         ts = _time.perf_counter() # fallback in threadpool
     print(f"[TNS {ts:.3f}] {msg}", flush=True)
 
+# --- wire encoding ---
+if orjson is not None:
+    def _dumps(payload) -> bytes:
+        return orjson.dumps(payload)
+else:
+    def _dumps(payload) -> bytes:
+        return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode()
+
+_mp_pack = msgpack.Packer(use_bin_type=True).pack if msgpack is not None else None
+
 # --- state & wiring ---
 state = State(cooldown_seconds=cfg.cooldown_seconds, default_threshold=cfg.default_threshold_shares)
-ws_clients: Set[WebSocket] = set()
-ws_lock = asyncio.Lock()
-# Sound
-_snd = sound_info(cfg.sound_file)
+# Config switches read on every trade / snapshot, resolved once (cfg doesn't change at runtime)
+_RVOL_ENABLED = bool(getattr(cfg, "rvol_enabled", True))
+_OBI_ENABLED = bool(getattr(cfg, "obi_enabled", True))
+_OBI_LEVELS_MAX = min(int(getattr(cfg, "obi_levels_max", 3)), 3)
+_obi_alpha_cfg = getattr(cfg, "obi_alpha", None)
+_OBI_ALPHA = float(_obi_alpha_cfg) if isinstance(_obi_alpha_cfg, (int, float)) else None
+# Copy-on-write: register/unregister swap in a new tuple, so broadcast() can iterate
+# whatever tuple it read without a lock (the swap has no await, hence is atomic on the loop).
+ws_clients: tuple["_WSClient", ...] = ()
+# Per-client outbound queue bound; a client that falls this far behind loses its oldest frames
+WS_Q_MAX = int(os.getenv("EI_WS_QUEUE_MAX", "256") or "256")
+# Sound (hashing the file is deferred to first use / startup, not import)
+_snd: SoundInfo | None = None
+
+def _sound_info() -> SoundInfo:
+    global _snd
+    if _snd is None:
+        _snd = sound_info(cfg.sound_file)
+    return _snd
 # Recording / playback setup
 REC_PATH = os.getenv("EI_RECORD_TO", "").strip()
 REPLAY_FROM = os.getenv("EI_REPLAY_FROM", "").strip()
@@ -166,21 +207,24 @@ async def _quote_worker():
     except asyncio.CancelledError:
         return
 
-# Manager: choose live vs playback
-if REPLAY_FROM:
-    manager = PlaybackManager(
-        ReplayConfig(path=REPLAY_FROM, rate=REPLAY_RATE, loop=REPLAY_LOOP),
-        on_status=lambda c: asyncio.create_task(broadcast_status(c)),
-        on_snapshot=lambda sym, asks, bids: asyncio.create_task(on_dom_snapshot(sym, asks, bids)),
-        on_error=lambda msg: asyncio.create_task(broadcast_error(msg)),
-        on_tape_quote=lambda b,a: enqueue_quote(b, a),
-        on_tape_trade=lambda ev: enqueue_trade(ev),
-    )
-else:
-    manager = IBDepthManager(
+# Manager: choose live vs playback. Built in lifespan rather than at import, so
+# importing the app (tests, a preloading parent process) never constructs an IB client.
+manager: IBDepthManager | PlaybackManager | None = None
+
+def _build_manager() -> IBDepthManager | PlaybackManager:
+    if REPLAY_FROM:
+        return PlaybackManager(
+            ReplayConfig(path=REPLAY_FROM, rate=REPLAY_RATE, loop=REPLAY_LOOP),
+            on_status=lambda c: asyncio.create_task(broadcast_status(c)),
+            on_snapshot=submit_dom_snapshot,
+            on_error=lambda msg: asyncio.create_task(broadcast_error(msg)),
+            on_tape_quote=lambda b,a: enqueue_quote(b, a),
+            on_tape_trade=lambda ev: enqueue_trade(ev),
+        )
+    return IBDepthManager(
         IBConfig(host=cfg.ib_host, port=cfg.ib_port, client_id=cfg.ib_client_id, smart_depth=cfg.smart_depth),
         on_status=lambda c: asyncio.create_task(broadcast_status(c)),
-        on_snapshot=lambda sym, asks, bids: asyncio.create_task(on_dom_snapshot(sym, asks, bids)),
+        on_snapshot=submit_dom_snapshot,
         on_error=lambda msg: asyncio.create_task(broadcast_error(msg)),
         on_tape_quote=lambda b,a: enqueue_quote(b, a),
         on_tape_trade=lambda ev: enqueue_trade(ev),
@@ -194,7 +238,7 @@ async def _rvol_backfill_when_ready(sym: str) -> None:
     Ensure RVOL backfill runs once IB + contract are ready.
     This prevents the 'start before connect' case from silently skipping RVOL forever.
     """
-    if not getattr(cfg, "rvol_enabled", True):
+    if not _RVOL_ENABLED:
         return
     ib = getattr(manager, "ib", None)
     if ib is None:
@@ -214,19 +258,29 @@ async def _rvol_backfill_when_ready(sym: str) -> None:
 
 # --- periodic stats heartbeat (default: every 1.0s; override via EI_STATS_HEARTBEAT_SEC) ---
 HEARTBEAT_SECONDS = float(os.getenv("EI_STATS_HEARTBEAT_SEC", "1.0") or "1.0")
+# (last, volume) as most recently sent to clients, by a book frame or a heartbeat
+_last_stats_sent: tuple | None = None
+# Last book frame broadcast (identical frames are skipped; replayed to new clients)
+_last_book_msg: dict | None = None
+
 async def _stats_heartbeat():
     """
     Push a tiny 'stats' frame with last/volume at a fixed cadence so the UI
-    refreshes even when DOM/quotes are quiet.
+    refreshes even when DOM/quotes are quiet. Book frames already carry the
+    same fields, so a tick is skipped when nothing changed since the last send.
     """
+    global _last_stats_sent
     try:
         while True:
             await asyncio.sleep(HEARTBEAT_SECONDS)
-            if not state.symbol:
+            if not state.symbol or not ws_clients:
                 continue
             last, volume = manager.current_quote()
             if last is None and volume is None:
                 continue
+            if (last, volume) == _last_stats_sent:
+                continue
+            _last_stats_sent = (last, volume)
             await broadcast({"type": "stats", "data": {"last": last, "volume": volume}})
     except asyncio.CancelledError:
         pass
@@ -236,13 +290,21 @@ async def _stats_heartbeat():
 async def lifespan(app: FastAPI):
     global recorder
     global _MAIN_LOOP
+    global manager
+    if manager is None:
+        manager = _build_manager()
+    _sound_info()
+    _preload_static()
     # Lazily create the recorder only once the event loop is definitely running
     if REC_PATH:
         recorder = NDJSONRecorder(
             REC_PATH,
             meta={"started_at": _time.strftime("%Y-%m-%dT%H:%M:%SZ", _time.gmtime())},
         )
+    # The loop itself is picked by the server: run.sh launches uvicorn with
+    # `--loop uvloop`, so this is a uvloop.Loop in normal operation.
     _MAIN_LOOP = asyncio.get_running_loop()
+    tns_log("event loop: %s", type(_MAIN_LOOP).__module__)
     mgr_task = asyncio.create_task(manager.run())
     hb_task = asyncio.create_task(_stats_heartbeat())
     quote_task = asyncio.create_task(_quote_worker())
@@ -250,6 +312,8 @@ async def lifespan(app: FastAPI):
     try:
         yield
     finally:
+        if _book_flush_task is not None:
+            _book_flush_task.cancel()
         quote_task.cancel()
         trade_task.cancel()
         hb_task.cancel()
@@ -266,65 +330,149 @@ async def lifespan(app: FastAPI):
         if recorder:
             await recorder.close()
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse if orjson is not None else JSONResponse)
 
 # --- static assets (serve existing ./web) ---
 WEB_DIR = Path("web")
+# Bodies are kept in memory and re-read only when (mtime, size) changes, so a
+# repeat hit costs one stat() instead of open/stat/read/close.
+_file_cache: Dict[Path, tuple[int, int, bytes, str]] = {}
+
+def _cached_file(path: Path) -> Optional[tuple[bytes, str]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    hit = _file_cache.get(path)
+    if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        return hit[2], hit[3]
+    try:
+        body = path.read_bytes()
+    except OSError:
+        return None
+    # Strong validator from the content, so a touch without an edit still 304s
+    etag = '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+    _file_cache[path] = (st.st_mtime_ns, st.st_size, body, etag)
+    return body, etag
+
+def _serve_cached(request: Request, path: Path, media_type: str, cache_control: str) -> Optional[Response]:
+    hit = _cached_file(path)
+    if hit is None:
+        return None
+    body, etag = hit
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=media_type, headers=headers)
+
+_PRELOAD_ASSETS = ("index.html", "app.js", "msgpack.js", "styles.css", "sw.js")
+
+def _preload_static() -> None:
+    for name in _PRELOAD_ASSETS:
+        _cached_file(WEB_DIR / name)
+
+def _not_found() -> Response:
+    return PlainTextResponse("not found", status_code=404)
+
 @app.get("/", include_in_schema=False)
-def _index():
-    return FileResponse(WEB_DIR / "index.html")
+def _index(request: Request):
+    return _serve_cached(request, WEB_DIR / "index.html", "text/html; charset=utf-8", "no-cache") or _not_found()
 
 @app.get("/index.html", include_in_schema=False)
-def _index2():
-    return FileResponse(WEB_DIR / "index.html")
+def _index2(request: Request):
+    return _index(request)
 
 @app.get("/app.js", include_in_schema=False)
-def _appjs():
-    return FileResponse(WEB_DIR / "app.js")
+def _appjs(request: Request):
+    return _serve_cached(request, WEB_DIR / "app.js", "application/javascript", "no-cache") or _not_found()
+
+@app.get("/msgpack.js", include_in_schema=False)
+def _msgpackjs(request: Request):
+    return _serve_cached(request, WEB_DIR / "msgpack.js", "application/javascript", "no-cache") or _not_found()
 
 @app.get("/styles.css", include_in_schema=False)
-def _css():
-    return FileResponse(WEB_DIR / "styles.css")
-
-@app.get("/sounds/{filename}", include_in_schema=False)
-def _sound(filename: str):
-    path = WEB_DIR / "sounds" / filename
-    if not path.exists():
-        return PlainTextResponse("not found", status_code=404)
-    ext = path.suffix.lower()
-    if ext in (".wav", ".wave"):
-        media = "audio/wav"
-    elif ext in (".mp3", ".mpeg"):
-        media = "audio/mpeg"
-    else:
-        media = "application/octet-stream"
-    headers = {"Cache-Control": "public, max-age=31536000, immutable"}
-    return FileResponse(path, headers=headers, media_type=media)
+def _css(request: Request):
+    return _serve_cached(request, WEB_DIR / "styles.css", "text/css; charset=utf-8", "no-cache") or _not_found()
+
+# Sounds are the only sizeable binaries, so they go through StaticFiles (sendfile +
+# built-in ETag/If-None-Match handling) with the long-lived immutable headers.
+class _SoundFiles(StaticFiles):
+    _MEDIA = {".wav": "audio/wav", ".wave": "audio/wav", ".mp3": "audio/mpeg", ".mpeg": "audio/mpeg"}
+
+    async def check_config(self) -> None:
+        # a missing sounds dir is a plain 404, not a startup error
+        return
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        media = self._MEDIA.get(Path(full_path).suffix.lower(), "application/octet-stream")
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media,
+                                headers={"Cache-Control": "public, max-age=31536000, immutable"})
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+app.mount("/sounds", _SoundFiles(directory=WEB_DIR / "sounds", check_dir=False), name="sounds")
 
 # Service worker for sound caching (cache-first on /sounds/*)
 @app.get("/sw.js", include_in_schema=False)
-def _sw():
-    p = WEB_DIR / "sw.js"
-    if not p.exists():
-        return PlainTextResponse("// no service worker", media_type="application/javascript")
+def _sw(request: Request):
     # always revalidate SW
-    headers = {"Cache-Control": "no-cache"}
-    return FileResponse(p, headers=headers, media_type="application/javascript")
+    resp = _serve_cached(request, WEB_DIR / "sw.js", "application/javascript", "no-cache")
+    if resp is None:
+        return PlainTextResponse("// no service worker", media_type="application/javascript")
+    return resp
 
 # --- YAML endpoints ---
 CONFIG_DATA_DIR = Path("./config-data")
+_yaml_text_cache: Dict[Path, tuple[int, int, str]] = {}
+
 def _read_yaml_or_default(filename: str, default_text: str) -> str:
     try:
         if CONFIG_DATA_DIR.exists():
             p = CONFIG_DATA_DIR / filename
-            if p.exists() and p.is_file():
-                return p.read_text(encoding="utf-8")
+            if p.is_file():
+                st = p.stat()
+                hit = _yaml_text_cache.get(p)
+                if hit is not None and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+                    return hit[2]
+                txt = p.read_text(encoding="utf-8")
+                _yaml_text_cache[p] = (st.st_mtime_ns, st.st_size, txt)
+                return txt
     except Exception:
         pass
     return default_text
 
+@functools.lru_cache(maxsize=32)
+def _normalize_watchlist_yaml(txt: str, alt_root: str) -> str:
+    """Re-root `alt_root:` (or keep `watchlist:`) as the UI-consumed `watchlist:` list."""
+    # PyYAML is imported on first use; with config.py's JSON cache warm, nothing
+    # else in the server needs it. libyaml bindings when available.
+    import yaml
+    try:
+        data = yaml.load(txt, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+        arr = data.get("watchlist")
+        if not isinstance(arr, list):
+            arr = data.get(alt_root, [])
+        if not isinstance(arr, list):
+            arr = []
+        return yaml.dump({"watchlist": arr}, Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper), sort_keys=False)
+    except Exception:
+        # fall through with raw txt if something odd happens
+        return txt
+
+@functools.lru_cache(maxsize=32)
+def _yaml_etag(txt: str) -> str:
+    return f'W/"{zlib.crc32(txt.encode("utf-8")):08x}"'
+
+def _yaml_response(request: Request, txt: str) -> Response:
+    # 'text/yaml' is fine; many clients also use 'application/x-yaml'
+    headers = {"ETag": _yaml_etag(txt), "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return PlainTextResponse(txt, media_type="text/yaml", headers=headers)
+
 @app.get("/api/yaml/watchlist", include_in_schema=False)
-def yaml_watchlist():
+def yaml_watchlist(request: Request):
     """
     Returns YAML for the ticker combobox.
     Expected structure (example):
@@ -334,11 +482,10 @@ def yaml_watchlist():
     """
     default_ = "watchlist: []\n"
     txt = _read_yaml_or_default("watchlist.yaml", default_)
-    # 'text/yaml' is fine; many clients also use 'application/x-yaml'
-    return PlainTextResponse(txt, media_type="text/yaml")
+    return _yaml_response(request, txt)
 
 @app.get("/api/yaml/thresholds", include_in_schema=False)
-def yaml_thresholds():
+def yaml_thresholds(request: Request):
     """
     Returns YAML for the threshold combobox.
     Normalizes your on-disk root:
@@ -353,22 +500,12 @@ def yaml_thresholds():
     """
     default_ = "watchlist: []\n"
     txt = _read_yaml_or_default("thresholds.yaml", default_)
-    try:
-        data = _yaml.safe_load(txt) or {}
-        # accept either `watchlist:` or your chosen `thresholds:` root
-        arr = data.get("watchlist")
-        if not isinstance(arr, list):
-            arr = data.get("thresholds", [])
-        if not isinstance(arr, list):
-            arr = []
-        txt = _yaml.safe_dump({"watchlist": arr}, sort_keys=False)
-    except Exception:
-        # fall through with raw txt if something odd happens
-        pass
-    return PlainTextResponse(txt, media_type="text/yaml")
+    # accept either `watchlist:` or your chosen `thresholds:` root
+    txt = _normalize_watchlist_yaml(txt, "thresholds")
+    return _yaml_response(request, txt)
 
 @app.get("/api/yaml/dollar-values", include_in_schema=False)
-def yaml_dollar_values():
+def yaml_dollar_values(request: Request):
     """
     Returns YAML for the Dollar value combobox.
     Normalizes your on-disk root:
@@ -385,18 +522,9 @@ def yaml_dollar_values():
     """
     default_ = "watchlist: []\n"
     txt = _read_yaml_or_default("dollar-value.yaml", default_)
-    try:
-        data = _yaml.safe_load(txt) or {}
-        # accept either `watchlist:` or your chosen `dollarvalue:` root
-        arr = data.get("watchlist")
-        if not isinstance(arr, list):
-            arr = data.get("dollarvalue", [])
-        if not isinstance(arr, list):
-            arr = []
-        txt = _yaml.safe_dump({"watchlist": arr}, sort_keys=False)
-    except Exception:
-        pass
-    return PlainTextResponse(txt, media_type="text/yaml")
+    # accept either `watchlist:` or your chosen `dollarvalue:` root
+    txt = _normalize_watchlist_yaml(txt, "dollarvalue")
+    return _yaml_response(request, txt)
 
 # --- API models ---
 class StartReq(BaseModel):
@@ -422,34 +550,55 @@ class MicroVWAPReq(BaseModel):
     band_k: float
 
 # --- API routes ---
+# Pre-encoded bodies: health has only two possible answers, and most of /api/config
+# is fixed at startup, so only the mutable fields get encoded per request.
+_HEALTH_BODY = {
+    True: _dumps({"ok": True, "connected": True}),
+    False: _dumps({"ok": True, "connected": False}),
+}
+_cfg_static: bytes | None = None
+
+def _config_static_prefix() -> bytes:
+    """JSON object for the config fields that never change, minus its closing brace."""
+    global _cfg_static
+    if _cfg_static is None:
+        _cfg_static = _dumps({
+            "defaultThresholdShares": cfg.default_threshold_shares,
+            "cooldownSeconds": cfg.cooldown_seconds,
+            "levelsToScan": cfg.levels_to_scan,
+            "priceReference": cfg.price_reference,
+            "smartDepth": cfg.smart_depth,
+            "soundAvailable": _sound_info().available,
+            "soundURL": _sound_info().url,
+            "soundsPath": "/sounds/", # base for ticksonic wavs
+            # OBI indicator config
+            "obi": {
+                "enabled": bool(getattr(cfg, "obi_enabled", True)),
+                "alpha": getattr(cfg, "obi_alpha", None),
+                "levelsMax": getattr(cfg, "obi_levels_max", 3),
+            },
+            "rvol": {
+                "enabled": bool(getattr(cfg, "rvol_enabled", True)),
+                "threshold": float(getattr(cfg, "rvol_threshold", 2.0)),
+                "lookbackDays": int(getattr(cfg, "rvol_lookback_days", 10)),
+            },
+        })[:-1]
+    return _cfg_static
+
 @app.get("/api/health")
 def api_health():
-    return {"ok": True, "connected": state.connected}
+    return Response(_HEALTH_BODY[bool(state.connected)], media_type="application/json")
 
 @app.get("/api/config")
 def api_config():
     tns_log("GET /api/config")
-    return {
-        "defaultThresholdShares": cfg.default_threshold_shares,
+    dynamic = _dumps({
         "currentThresholdShares": state.threshold,
-        "cooldownSeconds": cfg.cooldown_seconds,
-        "levelsToScan": cfg.levels_to_scan,
-        "priceReference": cfg.price_reference,
-        "smartDepth": cfg.smart_depth,
-        "soundAvailable": _snd.available,
-        "soundURL": _snd.url,
         "currentSide": state.side,
         # T&S config/state
         "silent": state.silent,
         "dollarThreshold": state.dollar_threshold,
         "bigDollarThreshold": state.big_dollar_threshold,
-        "soundsPath": "/sounds/", # base for ticksonic wavs
-        # OBI indicator config
-        "obi": {
-            "enabled": bool(getattr(cfg, "obi_enabled", True)),
-            "alpha": getattr(cfg, "obi_alpha", None),
-            "levelsMax": getattr(cfg, "obi_levels_max", 3),
-        },
         # Micro VWAP config (supports both DummyManager and IBDepthManager)
         "microVWAPConfig": {
             "minutes": (
@@ -463,20 +612,19 @@ def api_config():
             ),
             "bandK": getattr(manager, "_micro_band_k", 2.0),
         },
-        "rvol": {
-            "enabled": bool(getattr(cfg, "rvol_enabled", True)),
-            "threshold": float(getattr(cfg, "rvol_threshold", 2.0)),
-            "lookbackDays": int(getattr(cfg, "rvol_lookback_days", 10)),
-        },
-    }
+    })
+    # Splice: {static...} + {dynamic...} -> {static...,dynamic...}
+    return Response(_config_static_prefix() + b"," + dynamic[1:], media_type="application/json")
 
 @app.post("/api/start")
 async def api_start(req: StartReq):
     sym = state.set_symbol(req.symbol)
     # Clear last NBBO cache to avoid cross-symbol bestBid/bestAsk contamination
-    global _last_bid, _last_ask
+    global _last_bid, _last_ask, _last_book_msg
     _last_bid = None
     _last_ask = None
+    _last_book_msg = None
+    _book_superseded.clear()  # queued snapshots belong to the previous symbol
     if req.threshold is not None and req.threshold > 0:
         state.set_threshold(req.threshold)
     if req.side:
@@ -485,13 +633,13 @@ async def api_start(req: StartReq):
     state.set_tape_thresholds(req.dollar, req.bigDollar)
     if req.silent is not None:
         state.set_silent(req.silent)
-    tns_log(f"POST /api/start sym={state.symbol} side={state.side} "
-            f"thrShares={state.threshold} $thr={state.dollar_threshold} $big={state.big_dollar_threshold} "
-            f"silent={state.silent}")
+    tns_log("POST /api/start sym=%s side=%s thrShares=%s $thr=%s $big=%s silent=%s",
+            state.symbol, state.side, state.threshold, state.dollar_threshold,
+            state.big_dollar_threshold, state.silent)
 
     # RVOL: reset immediately on symbol change so trades can't be attributed to the old symbol.
     # Also start counting prints immediately; baseline backfill happens async.
-    if getattr(cfg, "rvol_enabled", True):
+    if _RVOL_ENABLED:
         try:
             if getattr(rvol_manager, "active_symbol", "") != sym:
                 rvol_manager.reset()
@@ -503,7 +651,7 @@ async def api_start(req: StartReq):
     await manager.subscribe_symbol(sym)
     
     # Trigger RVOL backfill (robust to delayed connect/contract qualification)
-    if getattr(cfg, "rvol_enabled", True):
+    if _RVOL_ENABLED:
         asyncio.create_task(_rvol_backfill_when_ready(sym))
     
     await broadcast_status(state.connected)
@@ -514,9 +662,11 @@ async def api_stop():
     tns_log("POST /api/stop")
     state.set_symbol("")
     # Clear last NBBO cache to avoid cross-symbol bestBid/bestAsk contamination
-    global _last_bid, _last_ask
+    global _last_bid, _last_ask, _last_book_msg
     _last_bid = None
     _last_ask = None
+    _last_book_msg = None
+    _book_superseded.clear()  # queued snapshots belong to the previous symbol
     await manager.unsubscribe()
     # Clear RVOL state too (prevents cross-symbol leakage)
     try:
@@ -531,19 +681,19 @@ async def api_threshold(req: ThresholdReq):
     if req.threshold < 1:
         return PlainTextResponse("threshold must be >=1", status_code=400)
     state.set_threshold(req.threshold)
-    tns_log(f"POST /api/threshold => {state.threshold}")
+    tns_log("POST /api/threshold => %s", state.threshold)
     return {"ok": True, "threshold": state.threshold}
 
 @app.post("/api/side")
 async def api_side(req: SideReq):
     s = state.set_side(req.side)
-    tns_log(f"POST /api/side => {s}")
+    tns_log("POST /api/side => %s", s)
     return {"ok": True, "side": s}
 
 @app.post("/api/silent")
 async def api_silent(req: SilentReq):
     state.set_silent(req.silent)
-    tns_log(f"POST /api/silent => {state.silent}")
+    tns_log("POST /api/silent => %s", state.silent)
     return {"ok": True, "silent": state.silent}
 
 @app.post("/api/microvwap")
@@ -559,47 +709,131 @@ async def api_microvwap(req: MicroVWAPReq):
         manager.set_micro_window_minutes(minutes)
     # Store band_k on manager in a generic way
     setattr(manager, "_micro_band_k", band_k)
-    tns_log(f"POST /api/microvwap => minutes={minutes} band_k={band_k}")
+    tns_log("POST /api/microvwap => minutes=%s band_k=%s", minutes, band_k)
     return {"ok": True, "minutes": minutes, "band_k": band_k}
 
 # --- WebSocket ---
+class _WSClient:
+    """One connected socket plus its outbound queue, drained by a dedicated writer task."""
+    __slots__ = ("ws", "msgpack", "q", "writer")
+
+    def __init__(self, ws: WebSocket, use_msgpack: bool):
+        self.ws = ws
+        self.msgpack = use_msgpack
+        self.q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=WS_Q_MAX) if WS_Q_MAX > 0 else asyncio.Queue()
+        self.writer: asyncio.Task | None = None
+
+# Frames that piled up while a send was in flight go out as one {"type":"batch","items":[...]} frame
+_JSON_BATCH_HEAD = b'{"type":"batch","items":['
+_JSON_BATCH_TAIL = b"]}"
+if msgpack is not None:
+    _mp_hdr = msgpack.Packer(use_bin_type=True)
+    _MP_BATCH_HEAD = _mp_hdr.pack_map_header(2) + _mp_hdr.pack("type") + _mp_hdr.pack("batch") + _mp_hdr.pack("items")
+
+def _batch_frame(c: _WSClient, bufs: list[bytes]) -> bytes:
+    if c.msgpack:
+        return _MP_BATCH_HEAD + _mp_hdr.pack_array_header(len(bufs)) + b"".join(bufs)
+    return _JSON_BATCH_HEAD + b",".join(bufs) + _JSON_BATCH_TAIL
+
+async def _ws_writer(c: _WSClient):
+    q = c.q
+    try:
+        while True:
+            bufs = [await q.get()]
+            while True:
+                try:
+                    bufs.append(q.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await c.ws.send_bytes(bufs[0] if len(bufs) == 1 else _batch_frame(c, bufs))
+            finally:
+                for _ in bufs:
+                    q.task_done()
+    except asyncio.CancelledError:
+        return
+    except Exception:
+        # Send failed (client gone). Exiting marks the client dead; the next
+        # broadcast() reaps it together with any other dead clients.
+        return
+
+def _remove_clients(dead: set[_WSClient]) -> None:
+    global ws_clients, _last_book_msg
+    ws_clients = tuple(x for x in ws_clients if x not in dead)
+    if not ws_clients:
+        # Snapshots aren't processed for an empty room, so the cached frame would go
+        # stale; the next joiner must not be replayed it (or have it dedupe a fresh one).
+        _last_book_msg = None
+
+def _register_ws(ws: WebSocket, use_msgpack: bool = False) -> _WSClient:
+    global ws_clients, _last_stats_sent
+    c = _WSClient(ws, use_msgpack)
+    c.writer = asyncio.create_task(_ws_writer(c))
+    ws_clients = ws_clients + (c,)
+    # The newcomer hasn't seen any stats yet: let the next heartbeat send them
+    _last_stats_sent = None
+    return c
+
+def _unregister_ws(c: _WSClient) -> None:
+    _remove_clients({c})
+    if c.writer is not None:
+        c.writer.cancel()
+
 @app.websocket("/ws")
 async def websocket_endpoint(ws: WebSocket):
-    await ws.accept()
-    async with ws_lock:
-        ws_clients.add(ws)
+    use_mp = msgpack is not None and "msgpack" in ws.scope.get("subprotocols", [])
+    await ws.accept(subprotocol="msgpack" if use_mp else None)
+    # No TCP_NODELAY tweak needed: asyncio and uvloop both disable Nagle on every
+    # accepted TCP transport, and the ASGI scope doesn't expose the raw socket.
+    c = _register_ws(ws, use_mp)
     try:
-        await send_json(ws, {"type": "status", "data": {"connected": state.connected, "symbol": state.symbol, "side": state.side}})
+        _send_to(c, {"type": "status", "data": {"connected": state.connected, "symbol": state.symbol, "side": state.side}})
+        # Late joiners get the current book now instead of waiting for it to change
+        if _last_book_msg is not None:
+            _send_to(c, _last_book_msg)
         while True:
             # we only use server → client; just keep connection alive
             await ws.receive_text()
     except WebSocketDisconnect:
         pass
     finally:
-        async with ws_lock:
-            ws_clients.discard(ws)
+        _unregister_ws(c)
 
 # --- Broadcast helpers ---
-async def send_json(ws: WebSocket, payload: Dict):
-    await ws.send_text(json.dumps(payload, separators=(",", ":")))
+def _send_to(c: _WSClient, payload: Dict):
+    """Queue a payload for a single client (encoded in its negotiated wire format)."""
+    _q_put_drop_old(c.q, _mp_pack(payload) if c.msgpack else _dumps(payload))
 
 async def broadcast(payload: Dict):
+    # Encode once per wire format and hand the bytes to each client's writer;
+    # a slow socket only backs up its own queue, never the fan-out.
+    clients = ws_clients
+    if not clients:
+        return
+    if TNS_DEBUG:
+        try:
+            _t = payload.get("type", "")
+            if _t in ("trade", "quote"):
+                tns_log("broadcast %s -> %d client(s)", _t, len(clients))
+        except Exception:
+            pass
+    data = packed = None
     stale = []
-    async with ws_lock:
-        if TNS_DEBUG:
-            try:
-                _t = payload.get("type", "")
-                if _t in ("trade", "quote"):
-                    tns_log(f"broadcast {_t} -> {len(ws_clients)} client(s)")
-            except Exception:
-                pass
-        for ws in ws_clients:
-            try:
-                await ws.send_text(json.dumps(payload, separators=(",", ":")))
-            except Exception:
-                stale.append(ws)
-        for ws in stale:
-            ws_clients.discard(ws)
+    for c in clients:
+        if c.writer is not None and c.writer.done():
+            stale.append(c)
+            continue
+        if c.msgpack:
+            if packed is None:
+                packed = _mp_pack(payload)
+            _q_put_drop_old(c.q, packed)
+        else:
+            if data is None:
+                data = _dumps(payload)
+            _q_put_drop_old(c.q, data)
+    if stale:
+        # One registry swap for all dead clients, after the fan-out
+        _remove_clients(set(stale))
 
 async def broadcast_status(connected: bool):
     state.set_connected(connected)
@@ -607,9 +841,22 @@ async def broadcast_status(connected: bool):
 
 async def broadcast_book(levels: list[AggregatedLevel], side: str):
     # (Deprecated single-side broadcaster retained for back-compat)
-    data = [{"price": float(l.price), "sumShares": l.sumShares, "rank": l.rank} for l in levels]
+    data = [{"price": l.price, "sumShares": l.sumShares, "rank": l.rank} for l in levels]
     await broadcast({"type": "book", "data": {"levels": data, "asks": data, "side": side}})
 
+# Ranks are always 0..n-1 (n <= 10), so share precomputed sequences instead of rebuilding
+# them; tuples, since every frame (and the cached _last_book_msg) holds the same objects
+_RANKS = tuple(tuple(range(n)) for n in range(11))
+
+def _side_columns(levels: list[AggregatedLevel]) -> dict:
+    """One book side as parallel arrays (no per-level dicts; keys sent once per side)."""
+    n = len(levels)
+    return {
+        "price": [l.price_ticks / TICKS_PER_UNIT for l in levels],
+        "sumShares": [l.sumShares for l in levels],
+        "rank": _RANKS[n] if n < len(_RANKS) else tuple(range(n)),
+    }
+
 async def broadcast_book_full(
     asks: list[AggregatedLevel], bids: list[AggregatedLevel],
     best_ask, best_bid, last, volume,
@@ -617,15 +864,19 @@ async def broadcast_book_full(
     obi_alpha: float | None = None,
     obi_levels: int | None = None,
 ):
-    tolist = lambda arr: [{"price": float(l.price), "sumShares": l.sumShares, "rank": l.rank} for l in arr]
+    global _last_stats_sent
+    _last_stats_sent = (last, volume)
+    mgr = manager
     # micro VWAP (from manager, if available)
     micro_vwap = None
     micro_sigma = None
     try:
-        if hasattr(manager, "_micro_vwap_and_sigma"):
-            micro_vwap, micro_sigma = manager._micro_vwap_and_sigma()
+        if hasattr(mgr, "_micro_vwap_and_sigma"):
+            micro_vwap, micro_sigma = mgr._micro_vwap_and_sigma()
     except Exception:
         micro_vwap, micro_sigma = None, None
+    # band multiplier from manager (set via /api/microvwap), default 2σ
+    band_k = getattr(mgr, "_micro_band_k", 2.0)
     # Simple action hint: compact, mutually exclusive, glanceable
     def _compute_action_hint():
         if last is not None:
@@ -636,8 +887,7 @@ async def broadcast_book_full(
             px = None
         if px is None or micro_vwap is None:
             return None
-        # band multiplier from manager (set via /api/microvwap), default 2σ
-        k = float(getattr(manager, "_micro_band_k", 2.0) or 2.0)
+        k = float(band_k or 2.0)
         band = (micro_sigma or 0.0) * k
         if band <= 0:
             return None
@@ -663,7 +913,7 @@ async def broadcast_book_full(
     stats = {
         "bestBid": float(best_bid) if best_bid is not None else None,
         "bestAsk": float(best_ask) if best_ask is not None else None,
-        "spread": (float(best_ask - best_bid) if (best_ask is not None and best_bid is not None) else None),
+        "spread": (float(round(best_ask - best_bid, 4)) if (best_ask is not None and best_bid is not None) else None),
         "last": (float(last) if last is not None else None),
         "volume": int(volume) if volume is not None else None,
         "obi": float(obi) if obi is not None else None,
@@ -671,22 +921,29 @@ async def broadcast_book_full(
         "obiLevels": int(obi_levels) if obi_levels is not None else None,
         "microVWAP": float(micro_vwap) if micro_vwap is not None else None,
         "microSigma": float(micro_sigma) if micro_sigma is not None else None,
-        "microBandK": float(getattr(manager, "_micro_band_k", 2.0)),
+        "microBandK": float(band_k),
         "actionHint": action_hint,
     }
-    await broadcast({
+    msg = {
         "type": "book",
         "data": {
-            "asks": tolist(asks),
-            "bids": tolist(bids),
+            "asks": _side_columns(asks),
+            "bids": _side_columns(bids),
             "side": state.side,
             "stats": stats
         }
-    })
+    }
+    # A changed raw DOM can still aggregate to the very same frame (venue swap at a
+    # price, churn below the top 10); clients already have it, so don't re-encode.
+    global _last_book_msg
+    if msg == _last_book_msg:
+        return
+    _last_book_msg = msg
+    await broadcast(msg)
 
 async def broadcast_alert(a: AlertEvent):
     await broadcast({"type": "alert", "data": {
-        "side": a.side, "symbol": a.symbol, "price": float(a.price),
+        "side": a.side, "symbol": a.symbol, "price": a.price_ticks / TICKS_PER_UNIT,
         "sumShares": a.sumShares, "timeISO": a.timeISO
     }})
 
@@ -713,9 +970,64 @@ async def broadcast_rvol_alert(alert: RVOLAlert):
     }})
 
 # --- DOM → aggregation glue ---
+# --- DOM snapshot coalescing ("latest wins") ---
+# Managers hand snapshots to submit_dom_snapshot(); only the newest one pending when the
+# flush task gets to run is aggregated and broadcast, at most EI_BOOK_MAX_HZ times a second.
+# Alerts are not coalesced: snapshots superseded before the flush are queued as-is and
+# the flush task checks their alert side first, so a short-lived wall can't slip
+# between flushes. The submitter itself only appends (O(1), no aggregation).
+BOOK_MAX_HZ = float(os.getenv("EI_BOOK_MAX_HZ", "30") or "0")  # 0 = no cadence cap
+_BOOK_MIN_INTERVAL = 1.0 / BOOK_MAX_HZ if BOOK_MAX_HZ > 0 else 0.0
+_BOOK_BACKLOG_MAX = 256  # superseded snapshots held for alert checks; oldest dropped past this
+_book_pending: tuple[str, list[DepthLevel], list[DepthLevel]] | None = None
+_book_superseded: deque[tuple[str, list[DepthLevel], list[DepthLevel]]] = deque(maxlen=_BOOK_BACKLOG_MAX)
+_book_flush_task: asyncio.Task | None = None
+_book_last_flush = 0.0
+
+def _superseded_alerts(symbol: str, asks: list[DepthLevel], bids: list[DepthLevel]) -> list[AlertEvent]:
+    # Same gates as _process_dom_snapshot, but only the alert side is aggregated
+    if symbol != state.symbol or not ws_clients:
+        return []
+    asks, bids = _filter_dom_outliers(asks, bids)
+    return aggregate_top10(state, asks, bids)[1]
+
+def submit_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthLevel]) -> None:
+    """Manager callback: record every snapshot, but process only the latest pending one."""
+    global _book_pending, _book_flush_task
+    if recorder:
+        recorder.record_depth(symbol, asks, bids)
+    if _book_pending is not None:
+        _book_superseded.append(_book_pending)
+    _book_pending = (symbol, asks, bids)
+    if _book_flush_task is None or _book_flush_task.done():
+        _book_flush_task = asyncio.create_task(_flush_dom_snapshots())
+
+async def _flush_dom_snapshots():
+    global _book_pending, _book_last_flush
+    while _book_pending is not None:
+        if _BOOK_MIN_INTERVAL:
+            wait = _book_last_flush + _BOOK_MIN_INTERVAL - _time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        symbol, asks, bids = _book_pending
+        _book_pending = None
+        _book_last_flush = _time.monotonic()
+        # Superseded snapshots are older than the latest, so their alerts go out first.
+        # Yield after each one: IB callbacks share this loop and must not queue up
+        # behind a long catch-up (anything they submit meanwhile is picked up below).
+        while _book_superseded:
+            for a in _superseded_alerts(*_book_superseded.popleft()):
+                await broadcast_alert(a)
+            await asyncio.sleep(0)
+        await _process_dom_snapshot(symbol, asks, bids)
+
 async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthLevel]):
+    """Record and process one snapshot immediately (no coalescing)."""
     if recorder:
         recorder.record_depth(symbol, asks, bids)
+    await _process_dom_snapshot(symbol, asks, bids)
+
+async def _process_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthLevel]):
     if DEBUG:
         print(f"DEBUG: on_dom_snapshot received data. Symbol: {symbol}, Current state symbol: {state.symbol}")
     # Ignore snapshots for stale symbols
@@ -723,6 +1035,9 @@ async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthL
         if DEBUG:
             print("DEBUG: Symbol mismatch, discarding snapshot.")
         return
+    # Nothing below has an audience without a client (recording already happened upstream)
+    if not ws_clients:
+        return
     # Drop extreme DOM outliers relative to the current anchor before aggregating.
     asks, bids = _filter_dom_outliers(asks, bids)
     ask_book, bid_book, alerts, best_ask, best_bid = aggregate_both_top10(state, asks, bids)
@@ -733,7 +1048,7 @@ async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthL
     # --- Sanity guard: if DOM best is clearly wrong, trust NBBO (tick-by-tick) ---
     try:
         use_nbbo = False
-        band = _pct_band()
+        band = _L2_BAND_PCT
         def _bad(px, ref):
             try:
                 return (px is None) or (float(px) <= 0) or \
@@ -743,13 +1058,13 @@ async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthL
         if _last_bid is not None and _last_ask is not None and _last_ask == _last_ask and _last_bid == _last_bid:
             if best_ask is None or best_bid is None:
                 use_nbbo = True
-            elif float(best_ask) <= float(best_bid):
+            elif best_ask <= best_bid:
                 use_nbbo = True
-            elif _bad(best_ask, _last_ask) or _bad(best_bid, _last_bid):
+            elif _bad(best_ask / TICKS_PER_UNIT, _last_ask) or _bad(best_bid / TICKS_PER_UNIT, _last_bid):
                 use_nbbo = True
         if use_nbbo:
-            best_bid = Decimal(str(_last_bid))
-            best_ask = Decimal(str(_last_ask))
+            best_bid = to_ticks(_last_bid)
+            best_ask = to_ticks(_last_ask)
     except Exception:
         # Never let the guardrail crash the pipeline
         pass
@@ -758,16 +1073,13 @@ async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthL
     obi_val = None
     obi_alpha_used = None
     obi_levels_used = None
-    if getattr(cfg, "obi_enabled", True) and ask_book and bid_book:
-        levels_avail = min(len(ask_book), len(bid_book))
-        L = max(0, min(getattr(cfg, "obi_levels_max", 3), 3, levels_avail))
+    if _OBI_ENABLED and ask_book and bid_book:
+        L = max(0, min(_OBI_LEVELS_MAX, len(ask_book), len(bid_book)))
         if L > 0:
-            qb = [bid_book[i].sumShares for i in range(L)]
-            qa = [ask_book[i].sumShares for i in range(L)]
+            qb = [l.sumShares for l in bid_book[:L]]
+            qa = [l.sumShares for l in ask_book[:L]]
             # Respect explicit alpha if provided; otherwise heuristic
-            alpha_cfg = getattr(cfg, "obi_alpha", None)
-            obi_alpha_used = (float(alpha_cfg) if isinstance(alpha_cfg, (int, float)) else
-                              choose_alpha_heuristic(qb, qa))
+            obi_alpha_used = _OBI_ALPHA if _OBI_ALPHA is not None else choose_alpha_heuristic(qb, qa)
             obi_val = compute_obi(qb, qa, obi_alpha_used)
             obi_levels_used = L
     
@@ -775,25 +1087,33 @@ async def on_dom_snapshot(symbol: str, asks: list[DepthLevel], bids: list[DepthL
     try:
         if best_ask is not None and best_bid is not None and best_ask <= best_bid:
             # Drop any rows that would keep the book crossed
-            ask_book = [lvl for lvl in ask_book if lvl.price > best_bid]
-            bid_book = [lvl for lvl in bid_book if lvl.price < best_ask]
+            ask_book = [lvl for lvl in ask_book if lvl.price_ticks > best_bid]
+            bid_book = [lvl for lvl in bid_book if lvl.price_ticks < best_ask]
             # If nothing left on a side, leave empty; UI will render blanks
         else:
             # If NBBO replacement adjusted bests, trim tables to be consistent
             if best_bid is not None:
-                bid_book = [lvl for lvl in bid_book if lvl.price <= best_bid]
+                bid_book = [lvl for lvl in bid_book if lvl.price_ticks <= best_bid]
             if best_ask is not None:
-                ask_book = [lvl for lvl in ask_book if lvl.price >= best_ask]
+                ask_book = [lvl for lvl in ask_book if lvl.price_ticks >= best_ask]
     except Exception:
         pass
     
     if ask_book or bid_book:
+        # Ticks -> float only here, at the wire boundary
+        if best_ask is not None:
+            best_ask = best_ask / TICKS_PER_UNIT
+        if best_bid is not None:
+            best_bid = best_bid / TICKS_PER_UNIT
         await broadcast_book_full(ask_book, bid_book, best_ask, best_bid, last, volume,
                                   obi=obi_val, obi_alpha=obi_alpha_used, obi_levels=obi_levels_used)
     for a in alerts:
         await broadcast_alert(a)
 
 # --- T&S broadcasting (TickSonic-compatible payloads) ---
+# price * size repeats constantly on an active tape (same level, round lots), so
+# memoize on the exact amount; the label itself is unchanged.
+@functools.lru_cache(maxsize=8192)
 def _fmt_amount(amount: float) -> tuple[str, bool]:
     # returns (label, is_big_label) — label mirrors TickSonic style
     if amount >= 1_000_000:
@@ -808,21 +1128,29 @@ def _fmt_amount(amount: float) -> tuple[str, bool]:
         return (f"{k:.1f}K", False)
     return (f"{amount:.2f}", False)
 
+# Classification results are shared tuples so the tape path never builds new ones.
+_TRADE_EPS = 1e-3
+_AT_ASK = ("at_ask", "green")
+_AT_BID = ("at_bid", "red")
+_ABOVE_ASK = ("above_ask", "yellow")
+_BELOW_BID = ("below_bid", "magenta")
+_BETWEEN_ASK = ("between_ask", "white")
+_BETWEEN_BID = ("between_bid", "white")
+_BETWEEN_MID = ("between_mid", "white")
+
 def _classify_trade(price: float, bid: Optional[float], ask: Optional[float]) -> tuple[str, str]:
-    eps = 1e-3
-    if not (isfinite(price) and (bid is None or isfinite(bid)) and (ask is None or isfinite(ask))):
-        return ("between_mid", "white")
-    b = bid or 0.0
-    a = ask or 0.0
-    if b == 0.0 or a == 0.0:
-        return ("between_mid", "white")
-    if abs(price - a) < eps: return ("at_ask", "green")
-    if abs(price - b) < eps: return ("at_bid", "red")
-    if price > a + eps: return ("above_ask", "yellow")
-    if price < b - eps: return ("below_bid", "magenta")
-    da = abs(price - a); db = abs(price - b)
-    if abs(da - db) < 1e-9: return ("between_mid", "white")
-    return ("between_ask", "white") if da < db else ("between_bid", "white")
+    # None/0.0 quotes short-circuit before the isfinite() calls; NaN is truthy so it still reaches them
+    if not bid or not ask or not (isfinite(price) and isfinite(bid) and isfinite(ask)):
+        return _BETWEEN_MID
+    da = price - ask
+    if -_TRADE_EPS < da < _TRADE_EPS: return _AT_ASK
+    db = price - bid
+    if -_TRADE_EPS < db < _TRADE_EPS: return _AT_BID
+    if da > _TRADE_EPS: return _ABOVE_ASK
+    if db < -_TRADE_EPS: return _BELOW_BID
+    da = -da
+    if -1e-9 < da - db < 1e-9: return _BETWEEN_MID
+    return _BETWEEN_ASK if da < db else _BETWEEN_BID
 
 # Keep most recent bid/ask seen (from tick-by-tick)
 _last_bid: Optional[float] = None
@@ -834,7 +1162,9 @@ async def broadcast_quote(bid: float | None, ask: float | None):
         recorder.record_quote(bid, ask)
     if bid is not None: _last_bid = bid
     if ask is not None: _last_ask = ask
-    tns_log(f"QUOTE bid={bid} ask={ask} (last_bid={_last_bid} last_ask={_last_ask})")
+    tns_log("QUOTE bid=%s ask=%s (last_bid=%s last_ask=%s)", bid, ask, _last_bid, _last_ask)
+    if not ws_clients:
+        return
     last, volume = manager.current_quote()
     await broadcast({
         "type": "quote", "bid": bid, "ask": ask,
@@ -845,24 +1175,35 @@ async def broadcast_trade(ev: dict):
     if recorder:
         recorder.record_trade(ev)
     # Pull inputs
-    sym = state.symbol or ev.get("sym") or ""
-    price = float(ev.get("price") or 0.0)
-    size = int(ev.get("size") or 0)
+    st = state
+    get = ev.get
+    sym = st.symbol or get("sym") or ""
+    price = float(get("price") or 0.0)
+    size = int(get("size") or 0)
     amount = price * size
+    dollar_thr = st.dollar_threshold
+    big_thr = st.big_dollar_threshold
     # Threshold filter (T&S only)
-    if state.dollar_threshold and amount < state.dollar_threshold:
-        tns_log(f"DROP trade (below $ threshold): sym={sym} px={price:.4f} sz={size} "
-                f"amt={amount:.2f} < $thr={state.dollar_threshold}")
+    if dollar_thr and amount < dollar_thr:
+        tns_log("DROP trade (below $ threshold): sym=%s px=%.4f sz=%d amt=%.2f < $thr=%s",
+                sym, price, size, amount, dollar_thr)
+        return
+    if not ws_clients:
+        # No UI attached: skip classify/format/encode, but RVOL still has to count the print
+        await _feed_rvol(price, size)
         return
     # Classify vs best available bid/ask (prefer per-event, fall back to globals)
-    bid = ev.get("bid") if ev.get("bid") is not None else _last_bid
-    ask = ev.get("ask") if ev.get("ask") is not None else _last_ask
+    bid = get("bid")
+    if bid is None:
+        bid = _last_bid
+    ask = get("ask")
+    if ask is None:
+        ask = _last_ask
     side, color = _classify_trade(price, bid, ask)
-    big = bool(state.big_dollar_threshold and amount >= state.big_dollar_threshold)
+    big = bool(big_thr and amount >= big_thr)
     amountStr, _ = _fmt_amount(amount)
-    tns_log(f"EMIT trade: sym={sym} px={price:.4f} sz={size} amt={amount:.2f} "
-            f"bid={bid} ask={ask} side={side} big={big} "
-            f"$thr={state.dollar_threshold} $big={state.big_dollar_threshold}")
+    tns_log("EMIT trade: sym=%s px=%.4f sz=%d amt=%.2f bid=%s ask=%s side=%s big=%s $thr=%s $big=%s",
+            sym, price, size, amount, bid, ask, side, big, dollar_thr, big_thr)
     last, volume = manager.current_quote()
     payload = {
         "type": "trade",
@@ -873,12 +1214,13 @@ async def broadcast_trade(ev: dict):
         "volume": volume,
         "side": side, "color": color, "big": big,
         "bid": bid, "ask": ask,
-        "silent": state.silent,
+        "silent": st.silent,
     }
     await broadcast(payload)
-    
-    # Feed RVOL Manager
-    if getattr(cfg, "rvol_enabled", True):
+    await _feed_rvol(price, size)
+
+async def _feed_rvol(price: float, size: int):
+    if _RVOL_ENABLED:
         alerts = rvol_manager.on_trade(price=price, size=size)
         for a in alerts:
             await broadcast_rvol_alert(a)
@@ -1,10 +1,16 @@
 # server_py/config.py
 from __future__ import annotations
-from dataclasses import dataclass
-import yaml
+from dataclasses import dataclass, fields
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
 from typing import Optional
 
-@dataclass
+# Frozen + slotted: config is read-only after load, and attribute reads skip __dict__
+@dataclass(frozen=True, slots=True)
 class Config:
     # Web/UI
     port: int = 8086
@@ -32,9 +38,9 @@ class Config:
 
     @classmethod
     def load(cls, path: str) -> "Config":
-        with open(path, "r", encoding="utf-8") as f:
-            data = yaml.safe_load(f) or {}
-        cfg = cls(**{**cls().__dict__, **data})
+        data = _load_cached(path)
+        # Only known fields reach __init__; stray YAML keys are ignored rather than a TypeError
+        cfg = cls(**{k: v for k, v in data.items() if k in _FIELD_NAMES})
         # Validation
         if cfg.levels_to_scan != 10:
             raise ValueError("levels_to_scan must be 10")
@@ -61,3 +67,44 @@ class Config:
         if cfg.default_threshold_shares < 1:
             raise ValueError("default_threshold_shares must be >= 1")
         return cfg
+
+
+_FIELD_NAMES = frozenset(f.name for f in fields(Config))
+
+
+# Parsed-config cache lives outside the source tree (override with EI_CACHE_DIR)
+CACHE_DIR = Path(os.getenv("EI_CACHE_DIR") or tempfile.gettempdir()) / "exit-indicator"
+
+
+def _load_cached(path: str) -> dict:
+    """
+    Parse `path` as YAML, reusing a JSON cache keyed on a hash of the file's bytes
+    (the config is tiny, so hashing it is cheaper than parsing, and unlike mtime/size
+    it can't miss a same-size edit). Writing the cache is best-effort: an unwritable
+    cache dir just means YAML gets parsed every start.
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    cache = CACHE_DIR / f"config-{hashlib.blake2b(raw, digest_size=16).hexdigest()}.json"
+    try:
+        with open(cache, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if isinstance(cached, dict):
+            return cached
+    except (OSError, ValueError):
+        pass
+    # Only a cache miss pays for importing PyYAML; libyaml-backed loader when
+    # available, same safe semantics as yaml.safe_load.
+    import yaml
+    data = yaml.load(raw.decode("utf-8"), Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+    tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, cache)
+    except (OSError, TypeError, ValueError):
+        # e.g. read-only dir, or YAML values JSON can't hold (dates)
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+    return data
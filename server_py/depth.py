@@ -1,77 +1,92 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from datetime import datetime, timezone
 from decimal import Decimal, getcontext
-from typing import Dict, List, Literal, Tuple, Optional
+from typing import Dict, List, Literal, NamedTuple, Tuple, Optional
 from .state import State
 getcontext().prec = 28 # safe precision for price math
 Side = Literal["ASK", "BID"]
-@dataclass(frozen=True)
-class DepthLevel:
+TICKS_PER_UNIT = 10_000
+
+def to_ticks(px: float | Decimal | str) -> int:
+    # Price -> integer 1e-4 ticks. Half-even, same as quantize(0.0001) and the
+    # UI's p.toFixed(4). Strings go through Decimal so "100.02" is exact.
+    if isinstance(px, str):
+        px = Decimal(px)
+    return round(px * TICKS_PER_UNIT)
+
+def ticks_to_str(t: int) -> str:
+    # Fixed 4 d.p. text; only used at the JSON/recording boundary.
+    q, r = divmod(t, TICKS_PER_UNIT)
+    return f"{q}.{r:04d}"
+
+# Hot-path records are NamedTuples: immutable, no per-instance dict, and tuple
+# construction is ~2x cheaper than a frozen dataclass (no guarded __setattr__).
+class DepthLevel(NamedTuple):
     side: Side
-    price: Decimal
+    price_ticks: int
     size: int
     venue: str
     level: int
-@dataclass(frozen=True)
-class AggregatedLevel:
-    price: Decimal
+    @property
+    def price(self) -> float:
+        return self.price_ticks / TICKS_PER_UNIT
+class AggregatedLevel(NamedTuple):
+    price_ticks: int
     sumShares: int
     rank: int
-@dataclass(frozen=True)
-class AlertEvent:
+    @property
+    def price(self) -> float:
+        return self.price_ticks / TICKS_PER_UNIT
+class AlertEvent(NamedTuple):
     side: Side
     symbol: str
-    price: Decimal
+    price_ticks: int
     sumShares: int
     timeISO: str
-def _price_key(p: Decimal) -> str:
-    # Canonical key so numerically-equal decimals hash to the same key.
-    # Align with UI (it groups rows by p.toFixed(4))
-    return f"{p.quantize(Decimal('0.0001')):f}"
+    @property
+    def price(self) -> float:
+        return self.price_ticks / TICKS_PER_UNIT
+
+def _sum_top_k(rows: List[DepthLevel], side: Side, k: int = 10) -> List[Tuple[int, int]]:
+    # Shared kernel: total size per tick for one side, best k first
+    # (lowest ask / highest bid). Locals bound once; one combined filter.
+    sums: Dict[int, int] = {}
+    get = sums.get
+    for r in rows:
+        if r.side == side and r.size > 0 and r.price_ticks > 0:
+            t = r.price_ticks
+            sums[t] = get(t, 0) + r.size
+    if not sums:
+        return []
+    return [(t, sums[t]) for t in sorted(sums, reverse=(side == "BID"))[:k]]
 
 def _aggregate_for_side(
     state: State, rows: List[DepthLevel], side: Side
-) -> Tuple[List[AggregatedLevel], List[AlertEvent], Optional[Decimal]]:
+) -> Tuple[List[AggregatedLevel], List[AlertEvent], Optional[int]]:
     if not rows:
         return [], [], None
-    sums: Dict[str, int] = {}
-    pmap: Dict[str, Decimal] = {}
-    for r in rows:
-        if r.side != side:
-            continue
-        if r.size <= 0:
-            continue
-        if not r.price.is_finite() or r.price <= 0:
-            continue
-        k = _price_key(r.price)
-        sums[k] = sums.get(k, 0) + int(r.size)
-        pmap[k] = pmap.get(k, r.price)
-    if not sums:
+    top = _sum_top_k(rows, side)
+    if not top:
         return [], [], None
-    keys = list(sums.keys())
-    # Sort: best ask lowest first; best bid highest first
-    keys.sort(key=lambda k: (pmap[k],) if side == "ASK" else (-pmap[k],))
-    keys = keys[:10]
     book: List[AggregatedLevel] = []
     alerts: List[AlertEvent] = []
     thr = state.threshold
-    from datetime import datetime, timezone
-    now_iso = datetime.now(timezone.utc).isoformat()
-    for i, k in enumerate(keys):
-        p = pmap[k]
-        total = sums[k]
-        book.append(AggregatedLevel(price=p, sumShares=total, rank=i))
+    now_iso = None  # formatted on first alert only; most snapshots have none
+    for i, (k, total) in enumerate(top):
+        book.append(AggregatedLevel(k, total, i))
         # Only alert on the state-selected side
-        if side == state.side and total >= thr and state.allow_alert(state.symbol, p):
+        if side == state.side and total >= thr and state.allow_alert(state.symbol, k):
+            if now_iso is None:
+                now_iso = datetime.now(timezone.utc).isoformat()
             alerts.append(AlertEvent(
-                side=side, symbol=state.symbol, price=p, sumShares=total, timeISO=now_iso
+                side=side, symbol=state.symbol, price_ticks=k, sumShares=total, timeISO=now_iso
             ))
-    best_price = pmap[keys[0]] if keys else None
+    best_price = top[0][0]
     return book, alerts, best_price
 
 def aggregate_both_top10(
     state: State, asks: List[DepthLevel], bids: List[DepthLevel]
-) -> Tuple[List[AggregatedLevel], List[AggregatedLevel], List[AlertEvent], Optional[Decimal], Optional[Decimal]]:
+) -> Tuple[List[AggregatedLevel], List[AggregatedLevel], List[AlertEvent], Optional[int], Optional[int]]:
     ask_book, ask_alerts, best_ask = _aggregate_for_side(state, asks, "ASK")
     bid_book, bid_alerts, best_bid = _aggregate_for_side(state, bids, "BID")
     alerts = ask_alerts + bid_alerts
@@ -82,35 +97,19 @@ def aggregate_top10(state: State, asks: List[DepthLevel], bids: List[DepthLevel]
     rows = asks if side == "ASK" else bids
     if not rows:
         return [], []
-    sums: Dict[str, int] = {}
-    pmap: Dict[str, Decimal] = {}
-    for r in rows:
-        if r.side != side:
-            continue
-        if r.size <= 0:
-            continue
-        if not r.price.is_finite() or r.price <= 0:
-            continue
-        k = _price_key(r.price)
-        sums[k] = sums.get(k, 0) + int(r.size)
-        pmap[k] = pmap.get(k, r.price)
-    if not sums:
+    top = _sum_top_k(rows, side) # levels_to_scan enforced by config validator
+    if not top:
         return [], []
-    # Sort: best ask lowest first; best bid highest first
-    keys = list(sums.keys())
-    keys.sort(key=lambda k: (pmap[k],) if side == "ASK" else (-pmap[k],))
-    keys = keys[:10] # levels_to_scan enforced by config validator
     book: List[AggregatedLevel] = []
     alerts: List[AlertEvent] = []
     thr = state.threshold
-    from datetime import datetime, timezone
-    now_iso = datetime.now(timezone.utc).isoformat()
-    for i, k in enumerate(keys):
-        p = pmap[k]
-        total = sums[k]
-        book.append(AggregatedLevel(price=p, sumShares=total, rank=i))
-        if total >= thr and state.allow_alert(state.symbol, p):
+    now_iso = None  # formatted on first alert only; most snapshots have none
+    for i, (k, total) in enumerate(top):
+        book.append(AggregatedLevel(k, total, i))
+        if total >= thr and state.allow_alert(state.symbol, k):
+            if now_iso is None:
+                now_iso = datetime.now(timezone.utc).isoformat()
             alerts.append(AlertEvent(
-                side=side, symbol=state.symbol, price=p, sumShares=total, timeISO=now_iso
+                side=side, symbol=state.symbol, price_ticks=k, sumShares=total, timeISO=now_iso
             ))
     return book, alerts
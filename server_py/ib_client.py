@@ -2,23 +2,58 @@ from __future__ import annotations
 import asyncio
 import time
 from typing import Any
+from collections import OrderedDict
 from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
 from typing import Callable, Optional, Tuple, List
 import os
+import random
+import sys
 from ib_async import IB, Stock, util, Contract, Ticker, DOMLevel
 from ib_async.objects import TickByTickAllLast, TickByTickBidAsk
-from .depth import DepthLevel
+from .depth import DepthLevel, TICKS_PER_UNIT, to_ticks
 
 # --- Verbose logging (enable via EI_TNS_DEBUG=1 or EI_DEBUG=1) ---
 DEBUG = (os.getenv("EI_TNS_DEBUG", "").strip().lower() in ("1","true","yes","on","debug") or
          os.getenv("EI_DEBUG", "").strip().lower() in ("1","true","yes","on","debug"))
 
-def log_debug(msg: str):
-    """Helper for timestamped debug logging."""
+def log_debug(msg: str, *args):
+    """Helper for timestamped debug logging.
+
+    `msg` is %-formatted with `args` only when DEBUG is on; per-event callers
+    pass args instead of an f-string so the disabled path builds no string.
+    """
     if DEBUG:
+        if args:
+            msg = msg % args
         print(f"[DEBUG {time.time():.3f}] {msg}")
 
+_INF = float("inf")
+_CONTRACT_CACHE_MAX = 32
+
+# IB informational / harmless codes (farm status, 310 "no market depth", ...)
+_IGNORED_ERR_CODES: frozenset[int] = frozenset({2104, 2106, 2158, 2152, 310, 2119})
+
+# marketMaker -> interned venue string (shared across rows and snapshots)
+_VENUES: dict[str, str] = {}
+
+def _wire(event, handler) -> None:
+    """Attach `handler` exactly once. ib_async reuses Ticker objects per contract, so
+    re-subscribing after a reconnect would otherwise stack duplicate handlers;
+    eventkit's `-=` is a no-op when the handler isn't connected."""
+    event -= handler
+    event += handler
+
+class _FibBackoff:
+    """Reconnect delays 1, 1, 2, 3, 5, 8, ... seconds, capped at `cap`."""
+    def __init__(self, cap: float = 30.0):
+        self.prev, self.cur, self.cap = 0.0, 1.0, cap
+
+    def next(self) -> float:
+        delay = min(self.cur, self.cap)
+        if self.cur < self.cap:
+            self.prev, self.cur = self.cur, self.prev + self.cur
+        return delay
+
 @dataclass
 class IBConfig:
     host: str
@@ -52,8 +87,12 @@ class IBDepthManager:
         self._on_tape_quote = on_tape_quote
         self._on_tape_trade = on_tape_trade
         self._stop_event = asyncio.Event()
-        self._throttle_ms = 50
-        self._last_emit_ms = 0
+        self._throttle_ns = 50_000_000  # 50ms, on the monotonic clock (immune to wall-clock steps)
+        self._last_emit_ns = 0
+        self._depth_flush: Optional[asyncio.TimerHandle] = None  # trailing-edge throttle timer
+        self._last_dom: Optional[tuple] = None  # raw (asks, bids) last emitted; skips unchanged DOMs
+        self._last_asks: List[DepthLevel] = []  # converted rows for _last_dom, reused per side
+        self._last_bids: List[DepthLevel] = []
         self._last_price: Optional[float] = None
         self._day_volume: Optional[int] = None
         self._official_day_volume: Optional[int] = None
@@ -68,23 +107,31 @@ class IBDepthManager:
         self._micro_window_sec: float = 300.0  # default 5 minutes; UI can override via API if needed
         # store (ts, price, size) for proper volume-weighted computation
         self._micro_trades: List[Tuple[float, float, int]] = []
+        # symbol switching (see subscribe_symbol)
+        self._pending_symbol: Optional[str] = None
+        self._sub_task: Optional[asyncio.Task] = None
+        # (symbol, venue, currency) -> qualified Contract, LRU-bounded
+        self._contract_cache: OrderedDict[tuple[str, str, str], Contract] = OrderedDict()
         log_debug("IBDepthManager initialized.")
 
     async def run(self):
-        backoff = 1.0
+        backoff = _FibBackoff()
         while not self._stop_event.is_set():
             try:
                 if not self.ib.isConnected():
                     log_debug("Not connected, attempting to connect...")
                     await self._connect_once()
-                    backoff = 1.0
+                    backoff = _FibBackoff()
                 await asyncio.sleep(0.5)
             except Exception as e:
                 self._on_status(False)
                 self._on_error(f"Connect loop error: {e}")
-                log_debug(f"Connection error: {e}. Backing off for {backoff:.1f}s.")
-                await asyncio.sleep(min(backoff, 30.0))
-                backoff *= 2.0
+                # Fibonacci growth minus up to 25% jitter, so clients of a restarted
+                # Gateway don't all reconnect in lockstep.
+                delay = backoff.next()
+                delay -= random.uniform(0.0, delay / 4)
+                log_debug(f"Connection error: {e}. Backing off for {delay:.1f}s.")
+                await asyncio.sleep(delay)
 
     async def stop(self):
         log_debug("stop() called.")
@@ -100,10 +147,12 @@ class IBDepthManager:
         self.ib.reqMarketDataType(1)
         self._on_status(True)
 
-        self.ib.pendingTickersEvent.clear();   self.ib.pendingTickersEvent   += self._on_pending_tickers
-        self.ib.errorEvent.clear();            self.ib.errorEvent            += self._on_ib_error
+        # DOM and quotes arrive via per-ticker updateEvent (bound in _subscribe_symbol);
+        # the global pendingTickersEvent fan-out is not needed.
+        # Never clear() shared ib_async events (other listeners may be attached)
+        _wire(self.ib.errorEvent, self._on_ib_error)
         # T&S is handled by the pump task; do not bind global tickByTick* events (avoids duplicates).
-        log_debug("Event handlers attached (DOM + error).")
+        log_debug("Event handlers attached (error).")
 
         if self._symbol:
             log_debug(f"Re-subscribing to '{self._symbol}' after reconnect.")
@@ -111,17 +160,29 @@ class IBDepthManager:
 
     async def subscribe_symbol(self, symbol: str):
         log_debug(f"subscribe_symbol() called for '{symbol}'. Current active: '{self._symbol}'.")
-        # First, always clean up any existing subscription completely.
-        await self.unsubscribe()
-
-        # Now, subscribe to the new symbol if one is provided.
-        sym = symbol.strip().upper()
-        if sym:
-            self._symbol = sym
-            if self.ib.isConnected():
-                await self._subscribe_symbol(self._symbol)
-            else:
-                log_debug("IB not connected yet; symbol staged for subscribe after connect.")
+        # Rapid flips (A -> B -> C) collapse onto one worker: only the newest request
+        # is applied, so a burst pays one 0.5s cancellation barrier, not one per call.
+        self._pending_symbol = symbol.strip().upper()
+        if self._sub_task is None or self._sub_task.done():
+            self._sub_task = asyncio.create_task(self._resub_worker())
+        # Shield: a cancelled caller (e.g. client disconnect) must not abort the switch
+        await asyncio.shield(self._sub_task)
+
+    async def _resub_worker(self):
+        while self._pending_symbol is not None:
+            sym = self._pending_symbol
+            # First, always clean up any existing subscription completely.
+            await self.unsubscribe()
+            if self._pending_symbol != sym:
+                continue  # superseded during the cancel barrier; nothing left to cancel
+            self._pending_symbol = None
+            # Now, subscribe to the new symbol if one is provided.
+            if sym:
+                self._symbol = sym
+                if self.ib.isConnected():
+                    await self._subscribe_symbol(self._symbol)
+                else:
+                    log_debug("IB not connected yet; symbol staged for subscribe after connect.")
 
     async def unsubscribe(self):
         log_debug(f"unsubscribe() called. Cleaning up '{self._symbol}'.")
@@ -143,6 +204,10 @@ class IBDepthManager:
         self._symbol = ""
         self._contract = None
         self._ticker = None
+        self._last_dom = None
+        if self._depth_flush is not None:
+            self._depth_flush.cancel()
+            self._depth_flush = None
         self._quote_ticker = None
         self._last_price, self._day_volume = None, None
         self._official_day_volume = None
@@ -150,7 +215,12 @@ class IBDepthManager:
         self._last_bid, self._last_ask = None, None
         # Reset micro VWAP state
         self._micro_trades.clear()
-        # Detach quote callback from the old quote ticker (avoid leaks)
+        # Detach callbacks from the old tickers (avoid leaks)
+        if ticker_to_cancel:
+            try:
+                ticker_to_cancel.updateEvent -= self._on_depth_update
+            except Exception:
+                pass
         if quote_ticker_to_cancel:
             try:
                 quote_ticker_to_cancel.updateEvent -= self._on_quote_update
@@ -195,14 +265,25 @@ class IBDepthManager:
         try:
             log_debug(f"Qualifying contract: Stock(symbol='{self._symbol}', exchange='SMART', currency='USD')")
             venue = "SMART" if self.cfg.smart_depth else "ISLAND"
-            contract = Stock(self._symbol, venue, "USD")
-            (qualified_contract,) = await self.ib.qualifyContractsAsync(contract)
+            # Qualification is an IB round-trip; A -> B -> A switches reuse the conId
+            key = (self._symbol, venue, "USD")
+            cache = self._contract_cache
+            qualified_contract = cache.get(key)
+            if qualified_contract is None:
+                contract = Stock(self._symbol, venue, "USD")
+                (qualified_contract,) = await self.ib.qualifyContractsAsync(contract)
+                cache[key] = qualified_contract
+                if len(cache) > _CONTRACT_CACHE_MAX:
+                    cache.popitem(last=False)  # evict least recently used
+            else:
+                cache.move_to_end(key)
             self._contract = qualified_contract
             log_debug(f"Contract QUALIFIED: {self._contract.conId}, {self._contract.symbol}")
 
             self._ticker = self.ib.reqMktDepth(
                 self._contract, numRows=10, isSmartDepth=self.cfg.smart_depth
             )
+            _wire(self._ticker.updateEvent, self._on_depth_update)
             log_debug(f"Created new MktDepth subscription for {self._symbol}.")
 
             # Request RTVolume (233) so IB publishes official day volume promptly
@@ -211,7 +292,7 @@ class IBDepthManager:
                 self._contract, "233", False, False
             )
             log_debug(f"Created new MktData subscription for {self._symbol}.")
-            self._quote_ticker.updateEvent += self._on_quote_update
+            _wire(self._quote_ticker.updateEvent, self._on_quote_update)
 
             # --- Tick-by-tick subscriptions ---
             # BidAsk for live NBBO-like reference
@@ -236,54 +317,76 @@ class IBDepthManager:
         except Exception as e:
             log_debug(f"CRITICAL ERROR during _subscribe_symbol for '{symbol}': {e}")
             self._on_error(f"Subscribe {symbol}: {e}")
+            # Don't keep reusing a contract that may be what failed
+            for key in [k for k in self._contract_cache if k[0] == symbol]:
+                del self._contract_cache[key]
             self._symbol = "" # Clear symbol on failure
 
     def _on_ib_error(self, reqId, code, msg, contract):
-        log_debug(f"RAW IB ERROR RECEIVED - reqId: {reqId}, code: {code}, msg: '{msg}'")
-        if code in {2104, 2106, 2158, 2152, 310, 2119}: 
+        log_debug("RAW IB ERROR RECEIVED - reqId: %s, code: %s, msg: '%s'", reqId, code, msg)
+        if code in _IGNORED_ERR_CODES:
             return
+        if code == 200 and contract is not None:
+            # "No security definition": forget any cached qualification for it
+            sym = getattr(contract, "symbol", "")
+            for key in [k for k in self._contract_cache if k[0] == sym]:
+                del self._contract_cache[key]
         self._on_error(f"Error {code}, reqId {reqId}: {msg}")
 
-    def _on_pending_tickers(self, tickers: List[Ticker]):
-        """This is the primary event handler for processing all market data updates."""
-        now_ms = time.time() * 1000.0
+    # NOTE: ib_async event signatures have shifted across 2.x; accept *args defensively.
+    def _on_depth_update(self, ticker: Ticker, *_: Any):
+        """Depth ticker updateEvent handler: throttled (trailing edge), deduplicated DOM snapshots."""
+        if ticker is not self._ticker:
+            return
+        wait_ns = self._throttle_ns - (time.monotonic_ns() - self._last_emit_ns)
+        if wait_ns > 0:
+            # Inside the window: coalesce instead of dropping. One timer per window;
+            # it reads the DOM when it fires, so the freshest book is what goes out.
+            if self._depth_flush is None:
+                self._depth_flush = asyncio.get_running_loop().call_later(wait_ns / 1e9, self._flush_depth)
+            elif DEBUG:
+                log_debug("depth update coalesced")
+            return
+        self._emit_depth()
+
+    def _flush_depth(self):
+        self._depth_flush = None
+        self._emit_depth()
+
+    def _emit_depth(self):
+        t = self._ticker
+        if t is None or not self._symbol or self._symbol != t.contract.symbol:
+            return
+        # updateEvent also fires for non-DOM fields; DOMLevel is a NamedTuple,
+        # so a tuple copy compares in C and skips the pipeline when nothing moved.
+        dom = (tuple(t.domAsks or ()), tuple(t.domBids or ()))
+        prev = self._last_dom
+        if dom == prev:
+            return
+        # Only real changes consume the throttle window
+        self._last_dom = dom
+        self._last_emit_ns = time.monotonic_ns()
+        # Most updates touch one side only; reuse the other side's converted rows
+        # (immutable NamedTuples in a list nobody mutates downstream).
+        if prev is None or dom[0] != prev[0]:
+            self._last_asks = self._convert_dom(dom[0], "ASK")
+        if prev is None or dom[1] != prev[1]:
+            self._last_bids = self._convert_dom(dom[1], "BID")
+        asks, bids = self._last_asks, self._last_bids
         if DEBUG:
-            try:
-                log_debug(f"pendingTickers: {len(tickers)} items; sym='{self._symbol or ''}'")
-            except Exception:
-                pass
-        # Check for quote updates first (keeps last/volume fresh for stats)
-        if self._quote_ticker and self._quote_ticker in tickers:
-            if DEBUG:
-                n = len(self._quote_ticker.tickByTicks or [])
-                log_debug(f"quote_ticker in batch; tickByTicks={n}")
-            self._on_quote_update(self._quote_ticker, True)  # Force update
-            # T&S is pump-driven; do not drain tickByTicks here.
-
-        # Check for depth updates, with throttling
-        if self._ticker and self._ticker in tickers:
-            if now_ms - self._last_emit_ms < self._throttle_ms:
-                if DEBUG:
-                    log_debug("depth update throttled")
-                return  # Throttle depth updates
-            self._last_emit_ms = now_ms
-            
-            if self._symbol and self._symbol == self._ticker.contract.symbol:
-                log_debug(f"Processing DOM for {self._symbol} via pendingTickersEvent")
-                asks = self._convert_dom(self._ticker.domAsks, "ASK")
-                bids = self._convert_dom(self._ticker.domBids, "BID")
-                if DEBUG:
-                    log_debug(f"DOM sizes: asks={len(asks)} bids={len(bids)}")
-                self._on_snapshot(self._symbol, asks, bids)
-                # T&S is event-driven; no draining here.
+            log_debug("DOM %s: asks=%d bids=%d", self._symbol, len(asks), len(bids))
+        self._on_snapshot(self._symbol, asks, bids)
+        # T&S is event-driven; no draining here.
     
     # NOTE: ib_async event signatures have shifted across 2.x; accept *args defensively.
     def _on_quote_update(self, ticker: Ticker, *_: Any):
         if ticker is not self._quote_ticker: return
         
         if self._symbol and self._symbol == ticker.contract.symbol:
-            lp = getattr(ticker, "last", None)
-            if lp is not None and not util.isNan(lp): self._last_price = float(lp)
+            # Ticker.last/.volume always exist (NaN until set); `x == x` is the
+            # call-free NaN test on this per-quote path.
+            lp = ticker.last
+            if lp is not None and lp == lp: self._last_price = float(lp)
 
             # ---- Day volume tracking (official baseline + TBT deltas) ----
             # In ib_async 2.x, quote updates can arrive frequently while the
@@ -302,9 +405,9 @@ class IBDepthManager:
 
             # Fallback to ticker.volume if rtVolume isn't available/mapped.
             if vol is None:
-                vol = getattr(ticker, "volume", None)
+                vol = ticker.volume
 
-            if vol is not None and not util.isNan(vol):
+            if vol is not None and vol == vol:
                 try:
                     v_int = int(vol)
                 except Exception:
@@ -410,32 +513,45 @@ class IBDepthManager:
     @staticmethod
     def _convert_dom(rows: List[DOMLevel], side: str) -> List[DepthLevel]:
         out: List[DepthLevel] = []
-        for i, r in enumerate(rows or []):
-            price_raw = getattr(r, "price", None)
-            size_raw = getattr(r, "size", 0)
-            # Validate price
-            try:
-                if isinstance(price_raw, Decimal):
-                    price = price_raw
-                else:
-                    if price_raw is None:
-                        continue
-                    if isinstance(price_raw, float) and util.isNan(price_raw):
-                        continue
-                    price = Decimal(str(price_raw))
-            except (InvalidOperation, ValueError, TypeError):
-                continue
-            if not price.is_finite() or price <= 0:
-                continue
-            # Validate size
-            try:
-                size = int(size_raw or 0)
-            except (ValueError, TypeError):
+        append = out.append
+        venues = _VENUES
+        # DOMLevel is a (price, size, marketMaker) NamedTuple: unpack instead of getattr
+        for i, (price_raw, size_raw, mm) in enumerate(rows or ()):
+            # Validate price -> integer 1e-4 ticks (no Decimal on the hot path).
+            # IB sends floats; one chained compare rejects NaN, inf and <= 0 without
+            # a try block. Other types (Decimal/str) take the slower checked path.
+            if type(price_raw) is float:
+                if not 0.0 < price_raw < _INF:
+                    continue
+                ticks = round(price_raw * TICKS_PER_UNIT)
+            else:
+                if price_raw is None:
+                    continue
+                try:
+                    ticks = to_ticks(price_raw)
+                except (ArithmeticError, ValueError, TypeError):
+                    continue  # NaN / inf / junk
+            if ticks <= 0:
                 continue
+            # Validate size (same split: floats branch-checked, anything else tried)
+            if type(size_raw) is float:
+                if not 0.0 < size_raw < _INF:
+                    continue
+                size = int(size_raw)
+            else:
+                try:
+                    size = int(size_raw or 0)
+                except (ValueError, TypeError):
+                    continue
             if size <= 0:
                 continue
-            venue = getattr(r, "mm", "") or "SMART"
-            out.append(DepthLevel(side=side, price=price, size=size, venue=venue, level=i))
+            # A handful of distinct venue names repeat on every row, so hand out
+            # one shared (interned) string each.
+            mm = mm or "SMART"
+            venue = venues.get(mm)
+            if venue is None:
+                venue = venues.setdefault(mm, sys.intern(mm))
+            append(DepthLevel(side, ticks, size, venue, i))
         return out
 
     # --- T&S: TBT pump task ---
@@ -503,7 +619,7 @@ class IBDepthManager:
                                     "timeISO": None,
                                 })
                         except Exception as e:
-                            log_debug(f"TBT pump item error: {e}")
+                            log_debug("TBT pump item error: %s", e)
                     self._tbt_index = n
                 # Adaptive sleep:
                 # - when we just processed ticks (start < n): keep latency tight
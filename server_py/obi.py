@@ -16,7 +16,8 @@ Edge cases:
   - If denominator <= 0, returns 0.0.
   - The function clamps the final result to [-1, +1].
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import math
 
 __all__ = ["compute_obi", "choose_alpha_heuristic"]
@@ -33,6 +34,11 @@ def _sanitize_levels(arr: List[float]) -> List[float]:
         out.append(f)
     return out
 
+@lru_cache(maxsize=64)
+def _weights(alpha: float, L: int) -> Tuple[float, ...]:
+    """w_i = exp(-alpha * i) for i = 1..L; alpha only takes a handful of values."""
+    return tuple(math.exp(-alpha * i) for i in range(1, L + 1))
+
 def choose_alpha_heuristic(qb: List[float], qa: List[float]) -> float:
     """
     Experience-based alpha selection when alpha is not provided.
@@ -89,10 +95,7 @@ def compute_obi(Q_bid: List[float], Q_ask: List[float], alpha: Optional[float] =
 
     num = 0.0
     den = 0.0
-    for i in range(1, L + 1):
-        w = math.exp(-a * i)
-        b = qb[i - 1]
-        k = qa[i - 1]
+    for w, b, k in zip(_weights(a, L), qb, qa):
         num += w * (b - k)
         den += w * (b + k)
 
@@ -2,15 +2,13 @@
 
 from __future__ import annotations
 
-import asyncio, gzip, json, time
+import asyncio, contextlib, gzip, json, time
 
 from dataclasses import dataclass
 
-from decimal import Decimal
-
 from typing import Optional, List
 
-from .depth import DepthLevel
+from .depth import DepthLevel, ticks_to_str
 
 
 
@@ -30,17 +28,25 @@ class NDJSONRecorder:
 
       - {t:ms, type:'depth'|'quote'|'trade', ...}
 
-    Uses an async writer so callbacks stay non-blocking.
+    Callbacks only stamp and enqueue the record; a writer task drains the queue in
+
+    batches, encodes them, and does the gzip write in a worker thread so neither
+
+    compression nor disk latency runs on the event loop.
 
     """
 
+    _BATCH_MAX = 256
+
+
+
     def __init__(self, path: str, meta: dict):
 
         self.path = path
 
         self.meta = {"format": "ei.ndjson", "version": 1, **meta}
 
-        self._q: asyncio.Queue[str | None] = asyncio.Queue()
+        self._q: asyncio.Queue[dict | None] = asyncio.Queue()
 
         self._t0 = time.monotonic()
 
@@ -50,25 +56,59 @@ class NDJSONRecorder:
 
     async def _writer(self):
 
-        with gzip.open(self.path, "wt", encoding="utf-8") as fh:
+        fh = await asyncio.to_thread(gzip.open, self.path, "wt", encoding="utf-8")
+
+        try:
+
+            await asyncio.to_thread(fh.write, json.dumps({"type": "meta", **self.meta}) + "\n")
+
+            done = False
+
+            while not done:
+
+                batch = [await self._q.get()]
+
+                while len(batch) < self._BATCH_MAX:
+
+                    try:
 
-            fh.write(json.dumps({"type": "meta", **self.meta}) + "\n")
+                        batch.append(self._q.get_nowait())
 
-            while True:
+                    except asyncio.QueueEmpty:
 
-                line = await self._q.get()
+                        break
 
-                if line is None:
+                lines = []
 
-                    # Mark sentinel as done so join() can complete
+                for obj in batch:
 
-                    self._q.task_done()
+                    if obj is None:
 
-                    break
+                        # Sentinel from close(); nothing is enqueued after it
 
-                fh.write(line + "\n")
+                        done = True
 
-                self._q.task_done()
+                        break
+
+                    lines.append(json.dumps(obj, separators=(",", ":")))
+
+                try:
+
+                    if lines:
+
+                        await asyncio.to_thread(fh.write, "\n".join(lines) + "\n")
+
+                finally:
+
+                    # Mark everything (sentinel included) done so join() can complete
+
+                    for _ in batch:
+
+                        self._q.task_done()
+
+        finally:
+
+            await asyncio.to_thread(fh.close)
 
 
 
@@ -76,7 +116,11 @@ class NDJSONRecorder:
 
         await self._q.put(None)
 
-        await self._q.join()
+        # Waiting on the writer (not just the queue) means the gzip trailer is on disk
+
+        with contextlib.suppress(Exception):
+
+            await self._task
 
 
 
@@ -84,7 +128,7 @@ class NDJSONRecorder:
 
         obj["t"] = _now_ms(self._t0)
 
-        self._q.put_nowait(json.dumps(obj, separators=(",", ":")))
+        self._q.put_nowait(obj)
 
 
 
@@ -94,7 +138,7 @@ class NDJSONRecorder:
 
         def enc(side: str, rows: List[DepthLevel]):
 
-            return [{"p": str(r.price), "s": int(r.size), "l": int(r.level), "v": r.venue} for r in rows[:10]]
+            return [{"p": ticks_to_str(r.price_ticks), "s": int(r.size), "l": int(r.level), "v": r.venue} for r in rows[:10]]
 
         self._enqueue({"type":"depth","sym":symbol,"asks":enc("ASK", asks),"bids":enc("BID", bids)})
 
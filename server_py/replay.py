@@ -6,11 +6,9 @@ import asyncio, contextlib, gzip, json
 
 from dataclasses import dataclass
 
-from decimal import Decimal
-
 from typing import Callable, Optional, List
 
-from .depth import DepthLevel
+from .depth import DepthLevel, to_ticks
 
 
 
@@ -182,7 +180,7 @@ class PlaybackManager:
 
                                 return [DepthLevel(
 
-                                    side=side, price=Decimal(str(r["p"])),
+                                    side=side, price_ticks=to_ticks(str(r["p"])),
 
                                     size=int(r["s"]), venue=r.get("v","SMART"), level=int(r["l"])
 
@@ -23,6 +23,9 @@ if [ -d .venv ]; then
   . .venv/bin/activate
 fi
 
+# uvloop + httptools + websockets (all ship with uvicorn[standard]); pinned explicitly so a
+# missing extra fails loudly instead of silently falling back to the slower asyncio/h11 stack.
 exec uvicorn server_py.app:app \
   --host 0.0.0.0 --port "${UVICORN_PORT}" --log-level info \
+  --loop uvloop --http httptools --ws websockets \
   --reload
@@ -47,15 +47,17 @@ class State:
     def set_silent(self, v: bool | int | str):
         self.silent = bool(v) if isinstance(v, bool) else (str(v).lower() in ("1","true","yes","on"))
 
-    def allow_alert(self, symbol: str, price: Decimal, now: float | None = None) -> bool:
+    def allow_alert(self, symbol: str, price: int | Decimal, now: float | None = None) -> bool:
         if now is None:
             now = time.time()
-        # Canonicalize price to 4 d.p. to match aggregation buckets and UI keys
-        try:
-            canonical = price.quantize(Decimal("0.0001"))
-        except Exception:
-            canonical = price
-        key = f"{symbol.upper()}:{canonical}"
+        # Key on integer 1e-4 ticks to match aggregation buckets and UI keys;
+        # Decimal prices (older callers) are converted with the same rounding.
+        if not isinstance(price, int):
+            try:
+                price = int((price * 10_000).to_integral_value())
+            except Exception:
+                pass
+        key = f"{symbol.upper()}:{price}"
         last = self._last_alert.get(key, 0.0)
         if now - last >= self.cooldown_seconds:
             self._last_alert[key] = now
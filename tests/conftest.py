@@ -76,11 +76,15 @@ def reset_app_state(app_module):
     s.silent = False
 
     # Reset WS
-    app_module.ws_clients.clear()
+    app_module.ws_clients = ()
 
     # Reset module-level NBBO cache so tests don't leak bid/ask across runs
     app_module._last_bid = None
     app_module._last_ask = None
+    # ...and the last book frame (dedup + late-joiner replay)
+    app_module._last_book_msg = None
+    app_module._book_pending = None
+    app_module._book_superseded.clear()
 
     yield
 
@@ -108,6 +112,7 @@ def set_config_dir(app_module, tmp_path, monkeypatch):
 def capture_broadcast(app_module, monkeypatch):
     """
     Capture app.broadcast(payload) calls (used by T&S + DOM broadcasts).
+    A placeholder client is registered so producers don't skip work for an empty room.
     """
     messages = []
 
@@ -115,4 +120,5 @@ def capture_broadcast(app_module, monkeypatch):
         messages.append(payload)
 
     monkeypatch.setattr(app_module, "broadcast", fake_broadcast)
+    monkeypatch.setattr(app_module, "ws_clients", (object(),))
     return messages
@@ -1,5 +1,6 @@
 import json
 import yaml
+from fastapi.testclient import TestClient
 
 
 def test_health_and_config(client):
@@ -88,3 +89,60 @@ def test_yaml_endpoints_normalize(client, set_config_dir):
         f"Threshold YAML normalization failed: {th_data}"
     assert isinstance(dv_data.get("watchlist"), list) and dv_data["watchlist"][0]["label"] == "$10", \
         f"Dollar values YAML normalization failed: {dv_data}"
+
+
+def test_static_assets_etag_and_304(client):
+    r = client.get("/app.js")
+    assert r.status_code == 200 and r.content
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "no-cache"
+
+    again = client.get("/app.js", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+
+    mp = client.get("/msgpack.js")
+    assert mp.status_code == 200 and b"MessagePack" in mp.content
+    assert mp.headers["content-type"].startswith("application/javascript")
+
+    snd = client.get("/sounds/buy.wav")
+    assert snd.status_code == 200 and snd.headers["content-type"] == "audio/wav"
+    assert "immutable" in snd.headers["cache-control"]
+    assert client.get("/sounds/nope.wav").status_code == 404
+
+
+def test_yaml_cache_picks_up_file_changes(client, set_config_dir):
+    p = set_config_dir / "thresholds.yaml"
+    p.write_text("thresholds:\n  - threshold: 5000\n", encoding="utf-8")
+    first = yaml.safe_load(client.get("/api/yaml/thresholds").text)
+    assert first["watchlist"] == [{"threshold": 5000}]
+    # repeat GET is served from cache with the same normalized text
+    assert yaml.safe_load(client.get("/api/yaml/thresholds").text) == first
+
+    p.write_text("thresholds:\n  - threshold: 5000\n  - threshold: 25000\n", encoding="utf-8")
+    second = yaml.safe_load(client.get("/api/yaml/thresholds").text)
+    assert [r["threshold"] for r in second["watchlist"]] == [5000, 25000]
+
+
+def test_sounds_static_mount_revalidates(client):
+    r = client.get("/sounds/alarm.mp3")
+    assert r.status_code == 200 and r.headers["content-type"] == "audio/mpeg"
+    again = client.get("/sounds/alarm.mp3", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_yaml_endpoint_etag_304(client, set_config_dir):
+    (set_config_dir / "watchlist.yaml").write_text("watchlist:\n  - symbol: 'AAPL'\n", encoding="utf-8")
+    r = client.get("/api/yaml/watchlist")
+    assert r.status_code == 200 and r.headers["etag"].startswith('W/"')
+    again = client.get("/api/yaml/watchlist", headers={"If-None-Match": r.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_static_assets_preloaded_with_content_etag(app_module):
+    app_module._file_cache.clear()
+    with TestClient(app_module.app) as c:
+        assert (app_module.WEB_DIR / "index.html") in app_module._file_cache
+        r = c.get("/")
+        assert r.status_code == 200 and r.headers["content-type"].startswith("text/html")
+        # same bytes -> same validator on both aliases
+        assert c.get("/index.html").headers["etag"] == r.headers["etag"]
@@ -18,6 +18,13 @@ def test_fmt_amount_and_classify():
     assert _classify_trade(9.99, 10.00, 10.02)[0] == "below_bid"
     # between: closer to ask
     assert _classify_trade(10.018, 10.00, 10.02)[0] in ("between_ask", "at_ask")
+    assert _classify_trade(10.005, 10.00, 10.02)[0] == "between_bid"
+    assert _classify_trade(10.01, 10.00, 10.02)[0] == "between_mid"
+    # missing / non-finite quotes fall back to mid
+    assert _classify_trade(10.01, None, 10.02) == ("between_mid", "white")
+    assert _classify_trade(10.01, 0.0, 10.02) == ("between_mid", "white")
+    assert _classify_trade(10.01, float("nan"), 10.02) == ("between_mid", "white")
+    assert _classify_trade(float("inf"), 10.00, 10.02) == ("between_mid", "white")
 
 
 @pytest.mark.asyncio
@@ -51,3 +58,70 @@ async def test_broadcast_trade_filters_and_payload(app_module, capture_broadcast
     await app_module.broadcast_trade({"price": 10.50, "size": 2000, "sym": "TSLA"})  # $21,000
     assert len(capture_broadcast) == initial_len + 1, f"Expected 1 new message; got {capture_broadcast}"
     assert capture_broadcast[-1]["big"] is True, f"Expected big print True; got {capture_broadcast[-1]}"
+
+
+def test_tns_log_formats_lazily(app_module, monkeypatch, capsys):
+    monkeypatch.setattr(app_module, "TNS_DEBUG", False)
+    app_module.tns_log("px=%.4f", object())  # would raise if formatted
+    assert capsys.readouterr().out == ""
+
+    monkeypatch.setattr(app_module, "TNS_DEBUG", True)
+    app_module.tns_log("EMIT px=%.4f sz=%d", 10.5, 200)
+    assert "EMIT px=10.5000 sz=200" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_broadcast_trade_without_clients_still_feeds_rvol(app_module, monkeypatch):
+    fed = []
+    monkeypatch.setattr(app_module.rvol_manager, "on_trade", lambda price, size: fed.append((price, size)) or [])
+
+    async def fail_broadcast(payload):
+        raise AssertionError(f"nothing should be broadcast without clients: {payload}")
+
+    monkeypatch.setattr(app_module, "broadcast", fail_broadcast)
+    assert app_module.ws_clients == ()
+    app_module.state.set_symbol("TSLA")
+    await app_module.broadcast_trade({"price": 10.0, "size": 100})
+    assert fed == [(10.0, 100)]
+
+
+@pytest.mark.asyncio
+async def test_stats_heartbeat_skips_unchanged_quote(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(app_module, "_last_stats_sent", None)
+    app_module.state.set_symbol("TSLA")
+    monkeypatch.setattr(app_module.manager, "_last", 10.0)
+    monkeypatch.setattr(app_module.manager, "_vol", 1000)
+
+    hb = asyncio.create_task(app_module._stats_heartbeat())
+    await asyncio.sleep(0.08)
+    app_module.manager._vol = 1100
+    await asyncio.sleep(0.05)
+    hb.cancel()
+    await hb
+
+    stats = [m["data"] for m in capture_broadcast if m["type"] == "stats"]
+    assert stats == [{"last": 10.0, "volume": 1000}, {"last": 10.0, "volume": 1100}]
+
+
+@pytest.mark.asyncio
+async def test_stats_heartbeat_resends_for_new_client(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "HEARTBEAT_SECONDS", 0.01)
+    monkeypatch.setattr(app_module, "_last_stats_sent", (10.0, 1000))  # already sent to earlier clients
+    app_module.state.set_symbol("TSLA")
+    monkeypatch.setattr(app_module.manager, "_last", 10.0)
+    monkeypatch.setattr(app_module.manager, "_vol", 1000)
+
+    class _WS:
+        async def send_bytes(self, data):
+            pass
+
+    c = app_module._register_ws(_WS())
+    hb = asyncio.create_task(app_module._stats_heartbeat())
+    await asyncio.sleep(0.05)
+    hb.cancel()
+    await hb
+    app_module._unregister_ws(c)
+
+    stats = [m["data"] for m in capture_broadcast if m["type"] == "stats"]
+    assert stats == [{"last": 10.0, "volume": 1000}], f"Unchanged stats must still reach a new client: {stats}"
@@ -7,15 +7,92 @@ class FakeWS:
     def __init__(self):
         self.sent = []
 
-    async def send_text(self, txt: str):
-        self.sent.append(txt)
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
 
 
 @pytest.mark.asyncio
 async def test_broadcast_sends_to_ws_clients(app_module):
     ws = FakeWS()
-    app_module.ws_clients.add(ws)
+    c = app_module._register_ws(ws)
     await app_module.broadcast({"type": "status", "data": {"connected": True, "symbol": "AAPL", "side": "ASK"}})
+    await asyncio.wait_for(c.q.join(), timeout=1.0)
+    app_module._unregister_ws(c)
     assert ws.sent, "No message delivered to fake websocket"
     payload = json.loads(ws.sent[-1])
     assert payload["type"] == "status" and payload["data"]["connected"] is True, f"Wrong payload: {payload}"
+
+
+def _items(sent):
+    """Flatten delivered frames, unpacking coalesced batch frames."""
+    out = []
+    for raw in sent:
+        msg = json.loads(raw)
+        out.extend(msg["items"] if msg["type"] == "batch" else [msg])
+    return out
+
+
+class StuckWS(FakeWS):
+    async def send_bytes(self, data: bytes):
+        await asyncio.Event().wait()  # never completes, like a client with a full TCP window
+
+
+@pytest.mark.asyncio
+async def test_broadcast_not_blocked_by_slow_client(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "WS_Q_MAX", 4)
+    slow = app_module._register_ws(StuckWS())
+    fast_ws = FakeWS()
+    fast = app_module._register_ws(fast_ws)
+    for i in range(10):
+        await asyncio.wait_for(app_module.broadcast({"type": "stats", "data": {"last": i}}), timeout=1.0)
+    await asyncio.wait_for(fast.q.join(), timeout=1.0)
+    items = _items(fast_ws.sent)
+    assert len(items) == 10, f"Fast client should get every frame; got {items}"
+    assert slow.q.qsize() <= 4, f"Slow client queue must stay bounded; got {slow.q.qsize()}"
+    assert items[-1]["data"]["last"] == 9
+    app_module._unregister_ws(slow)
+    app_module._unregister_ws(fast)
+
+
+@pytest.mark.asyncio
+async def test_queued_frames_coalesce_into_batch(app_module):
+    ws = FakeWS()
+    c = app_module._register_ws(ws)
+    # No await between broadcasts that yields to the writer -> all three are queued together
+    for i in range(3):
+        await app_module.broadcast({"type": "quote", "bid": 10.0 + i, "ask": 10.02 + i})
+    await asyncio.wait_for(c.q.join(), timeout=1.0)
+    assert len(ws.sent) == 1, f"Expected one coalesced frame; got {ws.sent}"
+    msg = json.loads(ws.sent[0])
+    assert msg["type"] == "batch" and [m["bid"] for m in msg["items"]] == [10.0, 11.0, 12.0], f"Bad batch: {msg}"
+    app_module._unregister_ws(c)
+
+
+@pytest.mark.asyncio
+async def test_client_registry_is_copy_on_write(app_module):
+    a = app_module._register_ws(FakeWS())
+    snapshot = app_module.ws_clients
+    b = app_module._register_ws(FakeWS())
+    app_module._unregister_ws(a)
+    assert snapshot == (a,), f"Earlier snapshot must not change under register/unregister; got {snapshot}"
+    assert app_module.ws_clients == (b,), f"Registry should only hold the live client; got {app_module.ws_clients}"
+    app_module._unregister_ws(b)
+
+
+class BrokenWS(FakeWS):
+    async def send_bytes(self, data: bytes):
+        raise RuntimeError("connection reset")
+
+
+@pytest.mark.asyncio
+async def test_dead_clients_reaped_on_next_broadcast(app_module):
+    live_ws = FakeWS()
+    live = app_module._register_ws(live_ws)
+    dead = [app_module._register_ws(BrokenWS()) for _ in range(3)]
+    await app_module.broadcast({"type": "stats", "data": {"last": 1}})
+    await asyncio.wait_for(asyncio.gather(*(c.writer for c in dead)), timeout=1.0)
+    await app_module.broadcast({"type": "stats", "data": {"last": 2}})
+    assert app_module.ws_clients == (live,), f"Dead clients should be reaped; got {app_module.ws_clients}"
+    await asyncio.wait_for(live.q.join(), timeout=1.0)
+    assert [m["data"]["last"] for m in _items(live_ws.sent)] == [1, 2]
+    app_module._unregister_ws(live)
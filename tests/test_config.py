@@ -1,3 +1,5 @@
+import dataclasses
+import os
 from pathlib import Path
 import pytest
 
@@ -41,3 +43,45 @@ def test_config_port_range(tmp_path: Path):
     with pytest.raises(ValueError) as e:
         Config.load(str(p))
     assert "invalid port" in str(e.value)
+
+
+def test_config_json_cache_tracks_source(tmp_path: Path, monkeypatch):
+    from server_py import config
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(config, "CACHE_DIR", cache_dir)
+    p = tmp_path / "cfg.yaml"
+    p.write_text("port: 9001\n", encoding="utf-8")
+    assert Config.load(str(p)).port == 9001
+    assert len(list(cache_dir.glob("config-*.json"))) == 1
+    # served from the cache on the second load
+    assert Config.load(str(p)).port == 9001
+
+    p.write_text("port: 9002\nlog_level: debug\n", encoding="utf-8")
+    cfg = Config.load(str(p))
+    assert cfg.port == 9002 and cfg.log_level == "debug"
+
+
+def test_config_cache_sees_same_size_edit_with_same_mtime(tmp_path: Path, monkeypatch):
+    from server_py import config
+    monkeypatch.setattr(config, "CACHE_DIR", tmp_path / "cache")
+    p = tmp_path / "cfg.yaml"
+    p.write_text("port: 9001\n", encoding="utf-8")
+    st = p.stat()
+    assert Config.load(str(p)).port == 9001
+    # e.g. coarse-mtime filesystem, `cp -p`, or a restore from an archive
+    p.write_text("port: 9009\n", encoding="utf-8")
+    os.utime(p, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert Config.load(str(p)).port == 9009
+    assert not list(tmp_path.glob("*.cache.json")), "nothing is written next to the YAML"
+
+
+def test_config_is_frozen():
+    cfg = Config.load("./server_py/config.tws.yaml")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.port = 1
+
+
+def test_config_ignores_unknown_keys(tmp_path: Path):
+    p = tmp_path / "extra.yaml"
+    p.write_text("port: 9003\nsome_future_option: 1\n", encoding="utf-8")
+    assert Config.load(str(p)).port == 9003
@@ -1,10 +1,9 @@
-from decimal import Decimal
-from server_py.depth import DepthLevel, aggregate_both_top10, aggregate_top10
+from server_py.depth import DepthLevel, to_ticks, aggregate_both_top10, aggregate_top10
 from server_py.state import State
 
 
 def _mk(side, px, size, venue="SMART", level=0):
-    return DepthLevel(side=side, price=Decimal(str(px)), size=int(size), venue=venue, level=level)
+    return DepthLevel(side=side, price_ticks=to_ticks(str(px)), size=int(size), venue=venue, level=level)
 
 
 def test_aggregate_both_top10_basic():
@@ -22,10 +21,10 @@ def test_aggregate_both_top10_basic():
 
     ask_book, bid_book, alerts, best_ask, best_bid = aggregate_both_top10(s, asks, bids)
 
-    assert ask_book[0].price == Decimal("100.00"), f"Best ask should be 100.00; got {ask_book[0].price}"
+    assert ask_book[0].price_ticks == to_ticks("100.00"), f"Best ask should be 100.00; got {ask_book[0].price}"
     assert ask_book[0].sumShares == 5600, f"Aggregated ask size wrong; got {ask_book[0].sumShares}"
-    assert bid_book[0].price == Decimal("99.90"), "Best bid should be highest bid"
-    assert best_ask == Decimal("100.00") and best_bid == Decimal("99.90")
+    assert bid_book[0].price_ticks == to_ticks("99.90"), "Best bid should be highest bid"
+    assert best_ask == to_ticks("100.00") and best_bid == to_ticks("99.90")
     assert len(alerts) == 1 and alerts[0].sumShares == 5600 and alerts[0].side == "ASK", \
         f"Only ASK alert expected; got {alerts}"
 
@@ -60,8 +59,16 @@ def test_aggregate_skips_non_positive_levels():
 
     ask_book, bid_book, alerts, best_ask, best_bid = aggregate_both_top10(s, asks, bids)
 
-    assert best_ask == Decimal("101.80")
-    assert best_bid == Decimal("101.20")
+    assert best_ask == to_ticks("101.80")
+    assert best_bid == to_ticks("101.20")
     assert ask_book[0].sumShares == 1000
     assert bid_book[0].sumShares == 900
     assert alerts, "Valid level should still trigger alerts when threshold met"
+
+
+def test_tick_helpers_round_trip():
+    from server_py.depth import ticks_to_str
+    assert to_ticks("100.02") == 1_000_200
+    assert to_ticks(100.02) == 1_000_200  # float noise rounds away
+    assert ticks_to_str(1_000_200) == "100.0200"
+    assert to_ticks(ticks_to_str(999_800)) == 999_800
@@ -1,12 +1,13 @@
-from decimal import Decimal
+import asyncio
+
 import pytest
 
-from server_py.depth import DepthLevel
+from server_py.depth import DepthLevel, to_ticks
 from server_py.state import State
 
 
 def _mk(side, px, size, level):
-    return DepthLevel(side=side, price=Decimal(str(px)), size=int(size), venue="SMART", level=level)
+    return DepthLevel(side=side, price_ticks=to_ticks(str(px)), size=int(size), venue="SMART", level=level)
 
 
 @pytest.mark.asyncio
@@ -38,7 +39,10 @@ async def test_on_dom_snapshot_broadcasts_full_book(app_module, capture_broadcas
 
     book_msg = next(m for m in capture_broadcast if m["type"] == "book")
     data = book_msg["data"]
-    assert len(data["asks"]) >= 1 and len(data["bids"]) >= 1
+    assert len(data["asks"]["price"]) >= 1 and len(data["bids"]["price"]) >= 1
+    assert data["asks"]["price"][0] == pytest.approx(100.00) and data["asks"]["sumShares"][0] == 5200
+    assert list(data["asks"]["rank"]) == list(range(len(data["asks"]["price"])))
+    assert isinstance(data["asks"]["rank"], tuple)  # shared across frames, so immutable
     assert data["stats"]["bestAsk"] == pytest.approx(100.00)
     assert data["stats"]["bestBid"] == pytest.approx(99.99)
     assert data["stats"]["last"] == pytest.approx(123.45)
@@ -47,3 +51,130 @@ async def test_on_dom_snapshot_broadcasts_full_book(app_module, capture_broadcas
     obi = data["stats"].get("obi", None)
     assert obi is not None and -1.0 <= obi <= 1.0, f"OBI missing or out of range: {data['stats']}"
     assert obi < 0, f"Expected ask-dominant OBI (<0); got {obi}"
+
+
+@pytest.mark.asyncio
+async def test_submit_dom_snapshot_latest_wins(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "_BOOK_MIN_INTERVAL", 0.0)
+    app_module.state.set_symbol("AAPL")
+    app_module.state.set_threshold(1_000_000)  # no alerts, books only
+
+    # Three snapshots land before the loop gets to run the flush task
+    for sz in (100, 200, 300):
+        app_module.submit_dom_snapshot(
+            "AAPL",
+            [_mk("ASK", 100.00, sz, 0)],
+            [_mk("BID", 99.99, sz, 0)],
+        )
+    await app_module._book_flush_task
+
+    books = [m for m in capture_broadcast if m["type"] == "book"]
+    assert len(books) == 1, f"Expected a single coalesced book; got {len(books)}"
+    assert books[0]["data"]["asks"]["sumShares"] == [300]
+
+
+def test_filter_dom_outliers_uses_anchor_band(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "_last_bid", 99.99)
+    monkeypatch.setattr(app_module, "_last_ask", 100.01)
+    asks = [_mk("ASK", 100.02, 100, 0), _mk("ASK", 500.00, 100, 1)]  # 500 is far outside ±20%
+    bids = [_mk("BID", 99.98, 100, 0), _mk("BID", 1.00, 100, 1)]
+    A, B = app_module._filter_dom_outliers(asks, bids)
+    assert [r.price_ticks for r in A] == [1_000_200]
+    assert [r.price_ticks for r in B] == [999_800]
+
+
+@pytest.mark.asyncio
+async def test_identical_book_frame_is_not_rebroadcast(app_module, capture_broadcast):
+    app_module.state.set_symbol("AAPL")
+    app_module.manager._last = 100.0
+    app_module.manager._vol = 1000
+    asks = [_mk("ASK", 100.01, 300, 0)]
+    bids = [_mk("BID", 99.99, 300, 0)]
+    await app_module.on_dom_snapshot("AAPL", asks, bids)
+    # Raw rows differ (venue) but aggregate to the same frame
+    asks2 = [DepthLevel("ASK", to_ticks("100.01"), 300, "ARCA", 0)]
+    await app_module.on_dom_snapshot("AAPL", asks2, bids)
+    assert [m["type"] for m in capture_broadcast] == ["book"]
+    assert app_module._last_book_msg is capture_broadcast[0]
+
+
+class _FakeWS:
+    def __init__(self):
+        self.sent = []
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+
+@pytest.mark.asyncio
+async def test_cached_book_dropped_when_last_client_leaves(app_module):
+    app_module.state.set_symbol("AAPL")
+    a = app_module._register_ws(_FakeWS())
+    await app_module.on_dom_snapshot("AAPL", [_mk("ASK", 100.01, 300, 0)], [_mk("BID", 99.99, 300, 0)])
+    assert app_module._last_book_msg is not None
+    app_module._unregister_ws(a)
+    # The book moves while nobody is connected; that snapshot is skipped entirely
+    await app_module.on_dom_snapshot("AAPL", [_mk("ASK", 105.00, 300, 0)], [_mk("BID", 99.99, 300, 0)])
+    assert app_module._last_book_msg is None, "A late joiner must not be replayed the pre-disconnect book"
+
+
+@pytest.mark.asyncio
+async def test_superseded_snapshot_still_alerts(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "_BOOK_MIN_INTERVAL", 0.0)
+    app_module.state.set_symbol("AAPL")
+    app_module.state.set_side("ASK")
+    app_module.state.set_threshold(5000)
+
+    # A wall appears and is gone again before the flush task runs
+    app_module.submit_dom_snapshot("AAPL", [_mk("ASK", 100.00, 6000, 0)], [_mk("BID", 99.99, 100, 0)])
+    app_module.submit_dom_snapshot("AAPL", [_mk("ASK", 100.00, 100, 0)], [_mk("BID", 99.99, 100, 0)])
+    await app_module._book_flush_task
+
+    books = [m for m in capture_broadcast if m["type"] == "book"]
+    alerts = [m["data"] for m in capture_broadcast if m["type"] == "alert"]
+    assert len(books) == 1 and books[0]["data"]["asks"]["sumShares"] == [100]
+    assert len(alerts) == 1 and alerts[0]["sumShares"] == 6000 and alerts[0]["price"] == pytest.approx(100.00)
+
+
+@pytest.mark.asyncio
+async def test_submit_dom_snapshot_does_no_aggregation(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "_BOOK_MIN_INTERVAL", 0.0)
+    app_module.state.set_symbol("AAPL")
+    app_module.state.set_threshold(5000)
+    calls = []
+    for name in ("_filter_dom_outliers", "aggregate_top10", "aggregate_both_top10"):
+        real = getattr(app_module, name)
+        monkeypatch.setattr(app_module, name,
+                            lambda *a, _n=name, _f=real: (calls.append(_n), _f(*a))[1])
+
+    for sz in (6000, 100, 200, 300):
+        app_module.submit_dom_snapshot("AAPL", [_mk("ASK", 100.00, sz, 0)], [_mk("BID", 99.99, sz, 0)])
+    assert calls == [], f"The manager callback must only queue snapshots; it ran {calls}"
+    assert len(app_module._book_superseded) == 3
+
+    await app_module._book_flush_task
+    assert calls.count("aggregate_top10") == 3 and calls.count("aggregate_both_top10") == 1
+    assert [m["data"]["sumShares"] for m in capture_broadcast if m["type"] == "alert"] == [6000]
+
+
+@pytest.mark.asyncio
+async def test_flush_catch_up_yields_to_ib_callbacks(app_module, capture_broadcast, monkeypatch):
+    monkeypatch.setattr(app_module, "_BOOK_MIN_INTERVAL", 0.0)
+    app_module.state.set_symbol("AAPL")
+    app_module.state.set_threshold(1_000_000)
+    for sz in range(100, 600, 100):
+        app_module.submit_dom_snapshot("AAPL", [_mk("ASK", 100.00, sz, 0)], [_mk("BID", 99.99, sz, 0)])
+    flush = app_module._book_flush_task
+    seen = []
+
+    async def ib_callback():
+        # Runs on the same loop as the flush, like ib_async's updateEvent
+        seen.append(flush.done())
+        app_module.submit_dom_snapshot("AAPL", [_mk("ASK", 100.00, 999, 0)], [_mk("BID", 99.99, 999, 0)])
+
+    cb = asyncio.create_task(ib_callback())
+    await flush
+    await cb
+    assert seen == [False], "The callback should run while the backlog is being checked"
+    books = [m["data"]["asks"]["sumShares"] for m in capture_broadcast if m["type"] == "book"]
+    assert books[-1] == [999]
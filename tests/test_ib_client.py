@@ -0,0 +1,183 @@
+import asyncio
+from types import SimpleNamespace
+
+import eventkit
+import pytest
+from ib_async import DOMLevel
+
+from server_py import ib_client
+from server_py.ib_client import IBConfig, IBDepthManager, _FibBackoff, _wire
+
+
+def _mgr(seen):
+    return IBDepthManager(
+        IBConfig(host="127.0.0.1", port=0, client_id=0, smart_depth=True),
+        on_status=lambda *_: None,
+        on_snapshot=lambda sym, asks, bids: seen.append((sym, asks, bids)),
+        on_error=lambda *_: None,
+        on_tape_quote=lambda *_: None,
+        on_tape_trade=lambda *_: None,
+    )
+
+
+def _ticker():
+    return SimpleNamespace(
+        contract=SimpleNamespace(symbol="AAPL"),
+        domAsks=[DOMLevel(100.02, 300, "ARCA")],
+        domBids=[DOMLevel(99.98, 200, "NSDQ")],
+    )
+
+
+class _Evt:
+    """Stand-in for a ticker's updateEvent; subscribe/unsubscribe are no-ops."""
+    def __iadd__(self, _fn):
+        return self
+
+    def __isub__(self, _fn):
+        return self
+
+
+def test_unchanged_dom_is_not_re_emitted():
+    seen = []
+    m = _mgr(seen)
+    m._throttle_ns = 0
+    t = _ticker()
+    m._symbol, m._ticker = "AAPL", t
+
+    m._on_depth_update(t)
+    m._on_depth_update(t)  # e.g. a trade-only update on the same ticker
+    assert len(seen) == 1
+    assert seen[0][1][0].price_ticks == 1_000_200
+
+    t.domAsks[0] = DOMLevel(100.02, 400, "ARCA")  # ib_async mutates in place
+    m._on_depth_update(t)
+    assert len(seen) == 2 and seen[1][1][0].size == 400
+
+
+@pytest.mark.asyncio
+async def test_updates_inside_throttle_window_are_coalesced_not_dropped():
+    seen = []
+    m = _mgr(seen)
+    m._throttle_ns = 20_000_000
+    t = _ticker()
+    m._symbol, m._ticker = "AAPL", t
+
+    m._on_depth_update(t)  # leading edge emits immediately
+    t.domAsks[0] = DOMLevel(100.02, 400, "ARCA")
+    m._on_depth_update(t)
+    t.domAsks[0] = DOMLevel(100.02, 500, "ARCA")
+    m._on_depth_update(t)
+    assert len(seen) == 1
+
+    await asyncio.sleep(0.05)
+    # One trailing emit carrying the freshest book
+    assert len(seen) == 2 and seen[1][1][0].size == 500
+
+
+def test_convert_dom_reads_market_maker_and_shares_venue_strings():
+    rows = [DOMLevel(100.02, 300, "".join(["AR", "CA"])), DOMLevel(100.03, 100, "".join(["AR", "CA"])),
+            DOMLevel(100.04, 100, "")]
+    out = IBDepthManager._convert_dom(rows, "ASK")
+    assert [r.venue for r in out] == ["ARCA", "ARCA", "SMART"]
+    assert out[0].venue is out[1].venue
+
+
+def test_unchanged_side_reuses_converted_rows():
+    seen = []
+    m = _mgr(seen)
+    m._throttle_ns = 0
+    t = _ticker()
+    m._symbol, m._ticker = "AAPL", t
+
+    m._on_depth_update(t)
+    t.domAsks[0] = DOMLevel(100.03, 300, "ARCA")  # ask-only change
+    m._on_depth_update(t)
+    assert seen[1][1][0].price_ticks == 1_000_300
+    assert seen[1][2] is seen[0][2]
+
+
+def test_convert_dom_drops_invalid_rows():
+    nan, inf = float("nan"), float("inf")
+    rows = [DOMLevel(nan, 100.0, "A"), DOMLevel(inf, 100.0, "A"), DOMLevel(-1.0, 100.0, "A"),
+            DOMLevel(10.0, nan, "A"), DOMLevel(10.0, 0.0, "A"), DOMLevel(10.0, 0.5, "A"),
+            DOMLevel(10.01, 5.0, "A")]
+    out = IBDepthManager._convert_dom(rows, "BID")
+    assert [(r.price_ticks, r.size, r.level) for r in out] == [(100_100, 5, 6)]
+
+
+@pytest.mark.asyncio
+async def test_rapid_symbol_flips_pay_one_cancel_barrier(monkeypatch):
+    m = _mgr([])
+    calls = []
+
+    async def fake_unsubscribe():
+        calls.append(m._symbol)
+        m._symbol = ""
+        await asyncio.sleep(0.02)  # stands in for the 0.5s Gateway barrier
+
+    monkeypatch.setattr(m, "unsubscribe", fake_unsubscribe)
+    monkeypatch.setattr(m.ib, "isConnected", lambda: False)
+
+    await asyncio.gather(m.subscribe_symbol("aapl"), m.subscribe_symbol("msft"), m.subscribe_symbol("tsla"))
+    assert m._symbol == "TSLA"
+    # All three land before the worker runs: one barrier, only the newest applied
+    assert len(calls) == 1
+
+    # A flip arriving mid-barrier supersedes the in-flight one; "nvda" is never
+    # subscribed, so the real unsubscribe on the retry has nothing to cancel.
+    first = asyncio.create_task(m.subscribe_symbol("nvda"))
+    await asyncio.sleep(0.005)
+    await m.subscribe_symbol("amd")
+    await first
+    assert m._symbol == "AMD" and len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_qualified_contracts_are_cached_lru(monkeypatch):
+    m = _mgr([])
+    qualified = []
+
+    async def fake_qualify(c):
+        qualified.append(c.symbol)
+        return [SimpleNamespace(symbol=c.symbol, conId=len(qualified))]
+
+    def fake_depth(*_a, **_k):
+        return SimpleNamespace(updateEvent=_Evt())
+
+    def fake_mkt(*_a, **_k):
+        return SimpleNamespace(updateEvent=_Evt(), tickByTicks=[])
+
+    async def fake_pump():
+        return None
+
+    async def fake_boot():
+        return None
+
+    monkeypatch.setattr(ib_client, "_CONTRACT_CACHE_MAX", 2)
+    monkeypatch.setattr(m.ib, "qualifyContractsAsync", fake_qualify)
+    monkeypatch.setattr(m.ib, "reqMktDepth", fake_depth)
+    monkeypatch.setattr(m.ib, "reqMktData", fake_mkt)
+    monkeypatch.setattr(m.ib, "reqTickByTickData", lambda *a, **k: None)
+    monkeypatch.setattr(m, "_pump_tbt", fake_pump)
+    monkeypatch.setattr(m, "_bootstrap_micro_vwap", fake_boot)
+
+    for sym in ("AAPL", "MSFT", "AAPL", "TSLA", "AAPL", "MSFT"):
+        m._symbol = sym
+        await m._subscribe_symbol(sym)
+    # AAPL stays hot; MSFT was the LRU entry when TSLA arrived, so it is re-qualified
+    assert qualified == ["AAPL", "MSFT", "TSLA", "MSFT"]
+
+
+def test_fib_backoff_grows_and_caps():
+    b = _FibBackoff(cap=10.0)
+    assert [b.next() for _ in range(8)] == [1.0, 1.0, 2.0, 3.0, 5.0, 8.0, 10.0, 10.0]
+
+
+def test_wire_is_idempotent():
+    calls = []
+    ev = eventkit.Event()
+    handler = calls.append
+    _wire(ev, handler)
+    _wire(ev, handler)  # e.g. re-subscribe after reconnect on the same Ticker
+    ev.emit(1)
+    assert calls == [1]
@@ -3,7 +3,7 @@
 import pytest
 from decimal import Decimal
 
-from server_py.depth import AggregatedLevel
+from server_py.depth import AggregatedLevel, to_ticks
 from server_py import app as app_module
 
 
@@ -24,8 +24,8 @@ async def test_broadcast_book_full_includes_micro_fields_and_hint(monkeypatch, c
 
     # Construct minimal books: price clearly above upper band to force a hint
     # microVWAP=100, sigma=1, k=2 => bands [98, 102]
-    asks = [AggregatedLevel(price=Decimal("105.00"), sumShares=1000, rank=0)]
-    bids = [AggregatedLevel(price=Decimal("95.00"), sumShares=1000, rank=0)]
+    asks = [AggregatedLevel(price_ticks=to_ticks("105.00"), sumShares=1000, rank=0)]
+    bids = [AggregatedLevel(price_ticks=to_ticks("95.00"), sumShares=1000, rank=0)]
 
     # Patch broadcast to capture the payload
     async def fake_broadcast(payload: dict):
@@ -83,8 +83,8 @@ async def test_action_hint_long_ok_scenario(monkeypatch, capture_broadcast):
     setattr(app_module.manager, "_micro_vwap_and_sigma", fake_micro)
     setattr(app_module.manager, "_micro_band_k", 2.0)
 
-    asks = [AggregatedLevel(price=Decimal("48.00"), sumShares=1000, rank=0)]
-    bids = [AggregatedLevel(price=Decimal("47.90"), sumShares=1000, rank=0)]
+    asks = [AggregatedLevel(price_ticks=to_ticks("48.00"), sumShares=1000, rank=0)]
+    bids = [AggregatedLevel(price_ticks=to_ticks("47.90"), sumShares=1000, rank=0)]
 
     async def fake_broadcast(payload: dict):
         capture_broadcast.append(payload)
@@ -127,8 +127,8 @@ async def test_action_hint_trend_up_and_down(monkeypatch, capture_broadcast):
     # Trend up: above band with strong positive OBI
     capture_broadcast.clear()
     await app_module.broadcast_book_full(
-        asks=[AggregatedLevel(price=Decimal("105.0"), sumShares=500, rank=0)],
-        bids=[AggregatedLevel(price=Decimal("104.9"), sumShares=2000, rank=0)],
+        asks=[AggregatedLevel(price_ticks=to_ticks("105.0"), sumShares=500, rank=0)],
+        bids=[AggregatedLevel(price_ticks=to_ticks("104.9"), sumShares=2000, rank=0)],
         best_ask=Decimal("105.0"),
         best_bid=Decimal("104.9"),
         last=105.0,
@@ -143,8 +143,8 @@ async def test_action_hint_trend_up_and_down(monkeypatch, capture_broadcast):
     # Trend down: below band with strong negative OBI
     capture_broadcast.clear()
     await app_module.broadcast_book_full(
-        asks=[AggregatedLevel(price=Decimal("95.1"), sumShares=2000, rank=0)],
-        bids=[AggregatedLevel(price=Decimal("95.0"), sumShares=500, rank=0)],
+        asks=[AggregatedLevel(price_ticks=to_ticks("95.1"), sumShares=2000, rank=0)],
+        bids=[AggregatedLevel(price_ticks=to_ticks("95.0"), sumShares=500, rank=0)],
         best_ask=Decimal("95.1"),
         best_bid=Decimal("95.0"),
         last=95.0,
@@ -28,3 +28,31 @@ async def test_recorder_close_no_hang(tmp_path):
 
     assert path.exists(), "Recording file was not created"
 
+
+
+
+@pytest.mark.asyncio
+
+async def test_recorder_batches_round_trip(tmp_path):
+
+    import gzip, json
+
+    path = tmp_path / "tape.ndjson.gz"
+
+    rec = NDJSONRecorder(str(path), meta={"sym": "AAPL"})
+
+    for i in range(300):  # more than one writer batch
+
+        rec.record_quote(100.0 + i, 100.01 + i)
+
+    rec.record_trade({"sym": "AAPL", "price": 100.5, "size": 10})
+
+    await rec.close()
+
+    lines = [json.loads(l) for l in gzip.open(path, "rt", encoding="utf-8")]
+
+    assert lines[0]["type"] == "meta" and lines[0]["sym"] == "AAPL"
+
+    assert [l["type"] for l in lines[1:]] == ["quote"] * 300 + ["trade"]
+
+    assert lines[300]["bid"] == 399.0 and "t" in lines[300]
@@ -118,15 +118,16 @@ async def test_replay_book_structure(app_module, capture_broadcast, tmp_path):
     assert "obiAlpha" in stats, f"Stats missing 'obiAlpha': {stats}"
     assert "obiLevels" in stats, f"Stats missing 'obiLevels': {stats}"
 
-    # Verify asks/bids are lists of levels
-    assert isinstance(data["asks"], list), f"Asks should be list; got {type(data['asks'])}"
-    assert isinstance(data["bids"], list), f"Bids should be list; got {type(data['bids'])}"
-
-    if data["asks"]:
-        ask_level = data["asks"][0]
-        assert "price" in ask_level, f"Ask level missing 'price': {ask_level}"
-        assert "sumShares" in ask_level, f"Ask level missing 'sumShares': {ask_level}"
-        assert "rank" in ask_level, f"Ask level missing 'rank': {ask_level}"
+    # Verify asks/bids are parallel arrays (price / sumShares / rank)
+    for side in ("asks", "bids"):
+        cols = data[side]
+        assert isinstance(cols, dict), f"{side} should be a dict of columns; got {type(cols)}"
+        for key in ("price", "sumShares"):
+            assert isinstance(cols.get(key), list), f"{side} missing '{key}' column: {cols}"
+        # rank reuses shared immutable tuples (encoded as an array on the wire)
+        assert isinstance(cols.get("rank"), tuple), f"{side} missing 'rank' column: {cols}"
+        assert len(cols["price"]) == len(cols["sumShares"]) == len(cols["rank"]), \
+            f"{side} columns have mismatched lengths: {cols}"
 
 
 @pytest.mark.asyncio
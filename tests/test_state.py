@@ -30,3 +30,10 @@ def test_allow_alert_cooldown():
     assert s.allow_alert(sym, Decimal("123.46"), now=101.0) is True
     # different symbol should bypass cooldown key
     assert s.allow_alert("MSFT", price, now=101.0) is True
+
+
+def test_allow_alert_ticks_share_key_with_decimal():
+    s = State(cooldown_seconds=2.0, default_threshold=1000)
+    assert s.allow_alert("AAPL", 1_234_500, now=100.0) is True
+    # Same price as Decimal maps onto the same 1e-4 tick key
+    assert s.allow_alert("AAPL", Decimal("123.45"), now=101.0) is False
@@ -1,12 +1,23 @@
 import json
 
+import pytest
+
 
 def test_websocket_initial_status(client):
     with client.websocket_connect("/ws") as ws:
-        first = ws.receive_text()
+        first = ws.receive_bytes()
         msg = json.loads(first)
         assert msg["type"] == "status" and "data" in msg, f"Unexpected WS message: {msg}"
         assert "connected" in msg["data"] and "symbol" in msg["data"] and "side" in msg["data"], \
             f"Status payload missing fields: {msg}"
         # Allow server loop to progress once, then close gracefully
         ws.send_text("ping")
+
+
+def test_websocket_msgpack_subprotocol(client):
+    msgpack = pytest.importorskip("msgpack")
+    with client.websocket_connect("/ws", subprotocols=["msgpack"]) as ws:
+        assert ws.accepted_subprotocol == "msgpack", f"Server did not negotiate msgpack: {ws.accepted_subprotocol}"
+        msg = msgpack.unpackb(ws.receive_bytes())
+        assert msg["type"] == "status" and "connected" in msg["data"], f"Unexpected msgpack frame: {msg}"
+        ws.send_text("ping")
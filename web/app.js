@@ -400,57 +400,81 @@
       }
     }, 5000);
   }
+  function handleWSMessage(msg) {
+    if (msg.type === 'status') {
+      setStatus(!!msg.data.connected, msg.data.symbol || '');
+      activeSymbol = msg.data.symbol || '';
+      if (msg.data.side) {
+        if (msg.data.side === 'BID') { if (els.sideBid) els.sideBid.checked = true; } else { if (els.sideAsk) els.sideAsk.checked = true; }
+        setBookTitle(msg.data.side);
+      }
+    } else if (msg.type === 'stats') {
+      // 1s heartbeat: refresh Last/Volume even when DOM/quotes are quiet
+      const d = msg.data || {};
+      if (els.last && d.last != null) {
+        els.last.textContent = fmt2(d.last);
+      }
+      if (els.vol && d.volume != null) {
+        els.vol.textContent = formatVolumeK(d.volume);
+      }
+      // Feed 1m volume chart (uses cumulative day volume deltas + last)
+      onMarketPulse({ last: d.last, volume: d.volume, timeISO: d.timeISO });
+    } else if (msg.type === 'book') {
+      if (msg.data.side) setBookTitle(msg.data.side);
+      // New payload: both sides + stats
+      if (msg.data.asks && msg.data.bids) {
+        renderBooks(msg.data);
+      } else {
+        // Back-compat (single side)
+        renderSingleSide(msg.data.levels || msg.data.asks || []);
+      }
+    } else if (msg.type === 'alert') {
+      appendAlert(msg.data);
+      pulseRowForAlert(msg.data);
+      if (!globalSilent) playSound(); // reuse existing alert beep, honor global mute
+    } else if (msg.type === 'quote') {
+      onTSQuote(msg);
+    } else if (msg.type === 'trade') {
+      onTSTrade(msg);
+    } else if (msg.type === 'rvol_alert') {
+      onRVOLAlert(msg.data || {});
+    } else if (msg.type === 'error') {
+      // MODIFIED: Ignore harmless Error 310
+      const m = (msg && msg.data && typeof msg.data.message === 'string') ? msg.data.message : '';
+      if (!m.includes('Error 310')) appendError(m || 'Error');
+    }
+  }
+  const wsDecoder = new TextDecoder();
   function connectWS() {
     const proto = location.protocol === 'https:' ? 'wss' : 'ws';
-    ws = new WebSocket(`${proto}://${location.host}/ws`);
+    // Prefer MessagePack framing when the decoder loaded; server falls back to JSON otherwise
+    const wantMsgpack = !!(window.MessagePack && window.MessagePack.decode);
+    ws = wantMsgpack
+      ? new WebSocket(`${proto}://${location.host}/ws`, ['msgpack'])
+      : new WebSocket(`${proto}://${location.host}/ws`);
+    // Server sends binary frames (UTF-8 JSON or MessagePack, per negotiated subprotocol)
+    ws.binaryType = 'arraybuffer';
     ws.onopen = () => {
       // Do NOT call AudioContext.resume() here.
       // Chrome/Opera require a user gesture; installAudioUnlocker() handles it.
     };
     ws.onmessage = (ev) => {
       try {
-        const msg = JSON.parse(ev.data);
-        if (msg.type === 'status') {
-          setStatus(!!msg.data.connected, msg.data.symbol || '');
-          activeSymbol = msg.data.symbol || '';
-          if (msg.data.side) {
-            if (msg.data.side === 'BID') { if (els.sideBid) els.sideBid.checked = true; } else { if (els.sideAsk) els.sideAsk.checked = true; }
-            setBookTitle(msg.data.side);
-          }
-        } else if (msg.type === 'stats') {
-          // 1s heartbeat: refresh Last/Volume even when DOM/quotes are quiet
-          const d = msg.data || {};
-          if (els.last && d.last != null) {
-            els.last.textContent = fmt2(d.last);
-          }
-          if (els.vol && d.volume != null) {
-            els.vol.textContent = formatVolumeK(d.volume);
-          }
-          // Feed 1m volume chart (uses cumulative day volume deltas + last)
-          onMarketPulse({ last: d.last, volume: d.volume, timeISO: d.timeISO });
-        } else if (msg.type === 'book') {
-          if (msg.data.side) setBookTitle(msg.data.side);
-          // New payload: both sides + stats
-          if (msg.data.asks && msg.data.bids) {
-            renderBooks(msg.data);
-          } else {
-            // Back-compat (single side)
-            renderSingleSide(msg.data.levels || msg.data.asks || []);
+        let msg;
+        if (typeof ev.data === 'string') {
+          msg = JSON.parse(ev.data);
+        } else if (ws.protocol === 'msgpack') {
+          msg = window.MessagePack.decode(new Uint8Array(ev.data));
+        } else {
+          msg = JSON.parse(wsDecoder.decode(ev.data));
+        }
+        if (msg.type === 'batch') {
+          // Frames coalesced server-side while the socket was busy
+          for (const item of (msg.items || [])) {
+            try { handleWSMessage(item); } catch (e) { console.warn('bad ws message', e); }
           }
-        } else if (msg.type === 'alert') {
-          appendAlert(msg.data);
-          pulseRowForAlert(msg.data);
-          if (!globalSilent) playSound(); // reuse existing alert beep, honor global mute
-        } else if (msg.type === 'quote') {
-          onTSQuote(msg);
-        } else if (msg.type === 'trade') {
-          onTSTrade(msg);
-        } else if (msg.type === 'rvol_alert') {
-          onRVOLAlert(msg.data || {});
-        } else if (msg.type === 'error') {
-          // MODIFIED: Ignore harmless Error 310
-          const m = (msg && msg.data && typeof msg.data.message === 'string') ? msg.data.message : '';
-          if (!m.includes('Error 310')) appendError(m || 'Error');
+        } else {
+          handleWSMessage(msg);
         }
       } catch (e) {
         console.warn('bad ws message', e);
@@ -785,13 +809,22 @@
     }
   }
 
+  // Book sides arrive as parallel arrays {price:[], sumShares:[], rank:[]}; older servers send row objects
+  function bookRows(side) {
+    if (Array.isArray(side)) return side;
+    if (!side || !Array.isArray(side.price)) return [];
+    const sizes = side.sumShares || [];
+    const ranks = side.rank || [];
+    return side.price.map((price, i) => ({ price, sumShares: sizes[i], rank: ranks[i] }));
+  }
+
   function renderBooks(data) {
     clearLoadingTimer();
     const thr = Math.max(1, parseInt(els.thr.value || '0', 10) || 1);
 
     // Snapshot current book for all order‑flow visuals
-    currentBook.bids = Array.isArray(data.bids) ? data.bids.slice(0, 10) : [];
-    currentBook.asks = Array.isArray(data.asks) ? data.asks.slice(0, 10) : [];
+    currentBook.bids = bookRows(data.bids).slice(0, 10);
+    currentBook.asks = bookRows(data.asks).slice(0, 10);
 
     // Age out expired bubbles
     pruneBubbles(Date.now());
@@ -1329,8 +1362,11 @@
       return '';
     }
   });
-  // Boot
-  initConfig().then(() => {
+  // Boot (deferred scripts such as /msgpack.js have run by DOMContentLoaded)
+  const domReady = document.readyState === 'loading'
+    ? new Promise(r => document.addEventListener('DOMContentLoaded', r, { once: true }))
+    : Promise.resolve();
+  Promise.all([initConfig(), domReady]).then(() => {
     initVol1mChart();
     initObiMiniChart();
     installAudioUnlocker();
@@ -0,0 +1,59 @@
+// Minimal MessagePack decoder for the /ws channel (decode only).
+// Covers everything the server's msgpack.Packer emits: nil/bool, ints, floats,
+// str, bin, arrays and maps. Exposed as window.MessagePack.decode(Uint8Array).
+(() => {
+  const utf8 = new TextDecoder();
+
+  function decode(bytes) {
+    const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+    let pos = 0;
+
+    function str(n) { const s = utf8.decode(bytes.subarray(pos, pos + n)); pos += n; return s; }
+    function bin(n) { const b = bytes.slice(pos, pos + n); pos += n; return b; }
+    function arr(n) { const a = new Array(n); for (let i = 0; i < n; i++) a[i] = next(); return a; }
+    function map(n) { const o = {}; for (let i = 0; i < n; i++) { const k = next(); o[k] = next(); } return o; }
+    function u8() { return view.getUint8(pos++); }
+    function u16() { const v = view.getUint16(pos); pos += 2; return v; }
+    function u32() { const v = view.getUint32(pos); pos += 4; return v; }
+
+    function next() {
+      const t = u8();
+      if (t < 0x80) return t;                          // positive fixint
+      if (t < 0x90) return map(t & 0x0f);              // fixmap
+      if (t < 0xa0) return arr(t & 0x0f);              // fixarray
+      if (t < 0xc0) return str(t & 0x1f);              // fixstr
+      if (t >= 0xe0) return t - 0x100;                 // negative fixint
+      let v;
+      switch (t) {
+        case 0xc0: return null;
+        case 0xc2: return false;
+        case 0xc3: return true;
+        case 0xc4: return bin(u8());
+        case 0xc5: return bin(u16());
+        case 0xc6: return bin(u32());
+        case 0xca: v = view.getFloat32(pos); pos += 4; return v;
+        case 0xcb: v = view.getFloat64(pos); pos += 8; return v;
+        case 0xcc: return u8();
+        case 0xcd: return u16();
+        case 0xce: return u32();
+        case 0xcf: v = view.getUint32(pos) * 4294967296 + view.getUint32(pos + 4); pos += 8; return v;
+        case 0xd0: v = view.getInt8(pos); pos += 1; return v;
+        case 0xd1: v = view.getInt16(pos); pos += 2; return v;
+        case 0xd2: v = view.getInt32(pos); pos += 4; return v;
+        case 0xd3: v = view.getInt32(pos) * 4294967296 + view.getUint32(pos + 4); pos += 8; return v;
+        case 0xd9: return str(u8());
+        case 0xda: return str(u16());
+        case 0xdb: return str(u32());
+        case 0xdc: return arr(u16());
+        case 0xdd: return arr(u32());
+        case 0xde: return map(u16());
+        case 0xdf: return map(u32());
+      }
+      throw new Error('msgpack: unsupported type 0x' + t.toString(16));
+    }
+
+    return next();
+  }
+
+  window.MessagePack = { decode };
+})();